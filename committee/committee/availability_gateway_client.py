@@ -1,13 +1,70 @@
 import logging
+import ssl
 from typing import Optional
 from urllib.parse import urljoin
 
-import requests
+import aiohttp
+import marshmallow
+import orjson
 
-from starkware.objects.availability import BatchDataResponse, CommitteeSignature, StateUpdate
+from starkware.objects.availability import BatchDataResponse, StateUpdate
+from starkware.objects.fields import int_from_hex
+from starkware.objects.state import OrderStateFact, VaultStateFact
 
 logger = logging.getLogger(__package__)
 
+# Schema construction is expensive, so a single instance is reused.
+BATCH_DATA_RESPONSE_SCHEMA = BatchDataResponse.Schema()
+
+# The fields of the objects in a get_batch_data response (the update field of the response itself
+# is optional).
+RESPONSE_KEYS = frozenset({'update'})
+UPDATE_KEYS = frozenset({'vaults', 'orders', 'vault_root', 'order_root', 'prev_batch_id'})
+VAULT_KEYS = frozenset({'stark_key', 'token', 'balance'})
+ORDER_KEYS = frozenset({'fulfilled_amount'})
+
+
+def check_keys(data: dict, expected_keys: frozenset):
+    """
+    Raises a ValidationError if the keys of data are not exactly expected_keys, as the schema
+    rejects both missing and unknown fields.
+    """
+    if data.keys() != expected_keys:
+        raise marshmallow.ValidationError(
+            f'Expected the fields {sorted(expected_keys)}, got: {sorted(data.keys())}.')
+
+
+def parse_batch_data_response(data: str) -> Optional[StateUpdate]:
+    """
+    Parses the response of get_batch_data.
+    Equivalent to BatchDataResponse.Schema().loads(data).update, but much faster for large batches,
+    as it skips the field-by-field processing of marshmallow. Missing and unknown fields, and hex
+    fields of the wrong format, are rejected with a ValidationError as in the schema.
+    """
+    response = orjson.loads(data)
+    if not response.keys() <= RESPONSE_KEYS:
+        check_keys(response, RESPONSE_KEYS)
+    update = response.get('update')
+    if update is None:
+        return None
+    check_keys(update, UPDATE_KEYS)
+    for vault in update['vaults'].values():
+        check_keys(vault, VAULT_KEYS)
+    for order in update['orders'].values():
+        check_keys(order, ORDER_KEYS)
+    return StateUpdate(
+        vaults={
+            int(vault_id): VaultStateFact(
+                stark_key=int_from_hex(vault['stark_key']), token=int_from_hex(vault['token']),
+                balance=int(vault['balance']))
+            for vault_id, vault in update['vaults'].items()},
+        orders={
+            int(order_id): OrderStateFact(fulfilled_amount=int(order['fulfilled_amount']))
+            for order_id, order in update['orders'].items()},
+        vault_root=update['vault_root'],
+        order_root=update['order_root'],
+        prev_batch_id=int(update['prev_batch_id']))
+
 
 class BadRequest(Exception):
     def __init__(self, status_code, text):
@@ -20,33 +77,57 @@ class BadRequest(Exception):
 
 
 class AvailabilityGatewayClient:
-    def __init__(self, gateway_url='http://localhost:9414/', requests_kwargs={}):
+    def __init__(self, gateway_url='http://localhost:9414/',
+                 ssl_context: Optional[ssl.SSLContext] = None, validate_schema: bool = False):
+        """
+        If validate_schema is True, batch data is parsed and validated using its marshmallow
+        schema, instead of the faster parse_batch_data_response().
+        """
         self.gateway_url = gateway_url
-        self.requests_kwargs = requests_kwargs
-
-    def _send_request(self, send_method, uri, data=None):
+        self.ssl_context = ssl_context
+        self.validate_schema = validate_schema
+        # A single session is used so that connections (and TLS handshakes) to the gateway are
+        # reused across requests. It is created lazily, as it must be created inside the event
+        # loop.
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def _send_request(self, send_method, uri, data=None):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(ssl=self.ssl_context))
         url = urljoin(self.gateway_url, uri)
-        res = requests.request(send_method, url, data=data, **self.requests_kwargs)
-        if res.status_code != 200:
-            raise BadRequest(res.status_code, res.text)
-        return res.text
+        async with self.session.request(send_method, url, data=data) as res:
+            text = await res.text()
+            if res.status != 200:
+                raise BadRequest(res.status, text)
+            return text
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
 
     async def order_tree_height(self) -> int:
         uri = "/availability_gateway/order_tree_height"
-        answer = self._send_request("GET", uri)
+        answer = await self._send_request("GET", uri)
         return int(answer)
 
     async def get_batch_data(self, batch_id: int) -> Optional[StateUpdate]:
         uri = f'/availability_gateway/get_batch_data?batch_id={batch_id}'
-        answer = self._send_request('GET', uri)
+        answer = await self._send_request('GET', uri)
 
-        return BatchDataResponse.Schema().loads(answer).update
+        if self.validate_schema:
+            return BATCH_DATA_RESPONSE_SCHEMA.loads(answer).update
+        return parse_batch_data_response(answer)
 
     async def send_signature(self, batch_id: int, sig: str, member_key: str, claim_hash: str):
-        encoded_signature = CommitteeSignature.Schema().dumps(CommitteeSignature(
-            batch_id=batch_id, signature=sig, member_key=member_key, claim_hash=claim_hash))
+        # Encodes a CommitteeSignature. All of its fields are serialized as is, so the schema is not
+        # needed.
+        encoded_signature = orjson.dumps({
+            'batch_id': batch_id, 'signature': sig, 'member_key': member_key,
+            'claim_hash': claim_hash})
 
-        answer = self._send_request(
+        answer = await self._send_request(
             'POST', f'/availability_gateway/approve_new_roots', data=encoded_signature)
 
         if answer != 'signature accepted':
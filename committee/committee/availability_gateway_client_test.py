@@ -0,0 +1,72 @@
+import json
+import os
+
+import marshmallow
+import pytest
+
+from starkware.objects.availability import BatchDataResponse
+
+from .availability_gateway_client import parse_batch_data_response
+
+
+@pytest.mark.parametrize('use_batch_info_file', [True, False])
+def test_parse_batch_data_response(use_batch_info_file):
+    """
+    Tests that parse_batch_data_response() agrees with the marshmallow schema of BatchDataResponse.
+    """
+    data = '{"update": null}'
+    if use_batch_info_file:
+        with open(os.path.join(os.path.dirname(__file__), 'batch_info.json')) as fp:
+            data = fp.read()
+
+    assert parse_batch_data_response(data) == BatchDataResponse.Schema().loads(data).update
+
+
+@pytest.mark.parametrize('stark_key', ['0xABC', 'abc', '0xa_bc', ' 0xabc', '0x'])
+def test_parse_batch_data_response_invalid_hex(stark_key):
+    """
+    Tests that parse_batch_data_response() rejects the hex strings that the schema rejects.
+    """
+    data = json.dumps({'update': {
+        'vaults': {'1': {'stark_key': stark_key, 'token': '0x1', 'balance': '1'}},
+        'orders': {}, 'vault_root': '00', 'order_root': '00', 'prev_batch_id': 0}})
+
+    with pytest.raises(marshmallow.ValidationError):
+        BatchDataResponse.Schema().loads(data)
+    with pytest.raises(marshmallow.ValidationError):
+        parse_batch_data_response(data)
+
+
+def make_batch_data_response(**update_changes):
+    update = {
+        'vaults': {'1': {'stark_key': '0x1', 'token': '0x2', 'balance': '3'}},
+        'orders': {'4': {'fulfilled_amount': '5'}},
+        'vault_root': '00', 'order_root': '00', 'prev_batch_id': 0}
+    update.update(update_changes)
+    return json.dumps(
+        {'update': {key: value for key, value in update.items() if value is not None}})
+
+
+@pytest.mark.parametrize('data', [
+    make_batch_data_response(vault_root=None),
+    make_batch_data_response(extra_field='0'),
+    make_batch_data_response(vaults={'1': {'stark_key': '0x1', 'token': '0x2'}}),
+    make_batch_data_response(
+        vaults={'1': {'stark_key': '0x1', 'token': '0x2', 'balance': '3', 'extra_field': '0'}}),
+    make_batch_data_response(orders={'4': {}}),
+    make_batch_data_response(orders={'4': {'fulfilled_amount': '5', 'extra_field': '0'}}),
+    json.dumps({'update': None, 'extra_field': '0'}),
+])
+def test_parse_batch_data_response_invalid_fields(data):
+    """
+    Tests that parse_batch_data_response() rejects missing and unknown fields, as the schema does.
+    """
+    with pytest.raises(marshmallow.ValidationError):
+        BatchDataResponse.Schema().loads(data)
+    with pytest.raises(marshmallow.ValidationError):
+        parse_batch_data_response(data)
+
+
+@pytest.mark.parametrize('data', [make_batch_data_response(), json.dumps({})])
+def test_parse_batch_data_response_valid_fields(data):
+    assert parse_batch_data_response(data) == BatchDataResponse.Schema().loads(data).update
@@ -1,11 +1,15 @@
 import asyncio
 import concurrent
+import gc
 import logging
 import logging.config
+import multiprocessing
 import os
+import ssl
+import struct
 import sys
 from dataclasses import field
-from typing import ClassVar, Type
+from typing import Awaitable, ClassVar, List, Optional, Tuple, Type
 
 import marshmallow
 import yaml
@@ -13,7 +17,7 @@ from marshmallow_dataclass import dataclass
 from web3 import eth
 
 from starkware.availability_claim import hash_availability_claim
-from starkware.crypto.signature.fast_pedersen_hash import pedersen_hash_func
+from starkware.crypto.signature.fast_pedersen_hash import pedersen_hash_batch
 from starkware.objects.availability import StateUpdate
 from starkware.objects.fields import BytesAsHex
 from starkware.objects.state import OrderStateFact, VaultStateFact
@@ -23,6 +27,7 @@ from starkware.storage.storage import Storage
 
 from .availability_gateway_client import AvailabilityGatewayClient, BadRequest
 from .custom_validation import is_valid
+from .parallel_hash import CachedHashFunc, ParallelHashFunc
 
 logger = logging.getLogger(__package__)
 
@@ -35,11 +40,37 @@ class CommitteeBatchInfo():
     Schema: ClassVar[Type[marshmallow.Schema]] = marshmallow.Schema
 
     def serialize(self) -> bytes:
-        return CommitteeBatchInfo.Schema().dumps(self).encode('ascii')
+        return COMMITTEE_BATCH_INFO_STRUCT.pack(
+            self.vaults_root, self.orders_root, self.sequence_number)
 
     @classmethod
     def deserialize(cls, data: bytes) -> 'CommitteeBatchInfo':
-        return cls.Schema().loads(data.decode('ascii'))
+        if len(data) == COMMITTEE_BATCH_INFO_STRUCT.size:
+            return cls(*COMMITTEE_BATCH_INFO_STRUCT.unpack(data))
+        # Batch info written by older versions of the committee is stored as JSON.
+        return COMMITTEE_BATCH_INFO_SCHEMA.loads(data.decode('ascii'))
+
+
+# A CommitteeBatchInfo is stored as vaults_root (32 bytes), orders_root (32 bytes) and
+# sequence_number (8 bytes, signed big-endian).
+COMMITTEE_BATCH_INFO_STRUCT = struct.Struct('>32s32sq')
+# Schema construction is expensive, so a single instance is reused.
+COMMITTEE_BATCH_INFO_SCHEMA = CommitteeBatchInfo.Schema()
+
+
+async def gather_or_cancel(*aws: Awaitable) -> List:
+    """
+    Same as asyncio.gather(*aws), except that if one of the awaitables fails, the others are
+    cancelled, and are done by the time the exception is raised.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
 
 
 class Committee:
@@ -60,6 +91,9 @@ class Committee:
             logger.info('Full validation mode enabled: validating both vaults and orders.')
         else:
             logger.info('Validating only vault data-availability.')
+        # The order tree height reported by the availability gateway (see
+        # validate_data_availability()).
+        self.gateway_trades_height: Optional[int] = None
         self.stopped = False
 
     def stop(self):
@@ -67,11 +101,11 @@ class Committee:
 
     @staticmethod
     def next_batch_id_key() -> bytes:
-        return 'committee_next_batch_id'.encode('ascii')
+        return b'committee_next_batch_id'
 
     @staticmethod
     def committee_batch_info_key(batch_id: int) -> bytes:
-        return f'committee_batch_info:{batch_id}'.encode('ascii')
+        return b'committee_batch_info:%d' % batch_id
 
     async def compute_initial_batch_info(self):
         # Compute a CommitteeBatchInfo with empty Merkle trees and sequence_number == -1.
@@ -90,14 +124,16 @@ class Committee:
         await self.storage.set_value(
             self.committee_batch_info_key(initial_batch_id), initial_batch_info)
 
-    async def validate_data_availability(self, batch_id: int,
-                                         state_update: StateUpdate, validate_orders: bool):
+    async def validate_data_availability(
+            self, batch_id: int, state_update: StateUpdate,
+            validate_orders: bool) -> Tuple[str, str, CommitteeBatchInfo]:
         """
         Given the state_update for a new batch, verify data availability by computing
         the roots for the new batch.
 
-        The new roots are stored in storage along with the sequence number
-        and a signed availability_claim is sent to the availability gateway.
+        Returns the signature on the availability_claim, the availability_claim and the
+        CommitteeBatchInfo of the new batch (the new roots along with the sequence number). The
+        batch info is not stored here, as the batch may still be rejected by the caller.
         """
 
         prev_batch_info = await self.storage.get_value(
@@ -109,42 +145,37 @@ class Committee:
         logger.info(f'Using batch {state_update.prev_batch_id} as reference')
 
         prev_batch_info = CommitteeBatchInfo.deserialize(prev_batch_info)
+        expected_vault_root = bytes.fromhex(state_update.vault_root)
+        expected_order_root = bytes.fromhex(state_update.order_root)
 
-        # Task to compute the new vault root.
-        async def compute_vault_root(storage):
-            vault_tree = MerkleTree(prev_batch_info.vaults_root, self.vaults_merkle_height,
-                                    storage, self.hash_func)
-            vault_tree = await vault_tree.update(state_update.vaults.items())
-            return vault_tree.root.hex()
-
-        # Task to compute the new order root.
-        async def compute_order_root(storage):
-            order_tree = MerkleTree(prev_batch_info.orders_root, self.orders_merkle_height,
-                                    storage, self.hash_func)
-            order_tree = await order_tree.update(state_update.orders.items())
-            return order_tree.root.hex()
+        # Task to compute the new root of a tree.
+        async def compute_root(storage, prev_root, height, modifications):
+            tree = MerkleTree(prev_root, height, storage, self.hash_func)
+            return (await tree.update(modifications)).root
 
         # Verify consistency of data with roots.
         async with immediate_storage(self.merkle_storage) as storage:
+            compute_vault_root = compute_root(
+                storage, prev_batch_info.vaults_root, self.vaults_merkle_height,
+                state_update.vaults.items())
             if validate_orders:
                 vault_root, order_root = await asyncio.gather(
-                    compute_vault_root(storage), compute_order_root(storage))
-                assert vault_root == state_update.vault_root, 'vault root mismatch'
-                assert order_root == state_update.order_root, 'order root mismatch'
+                    compute_vault_root,
+                    compute_root(
+                        storage, prev_batch_info.orders_root, self.orders_merkle_height,
+                        state_update.orders.items()))
+                assert vault_root == expected_vault_root, 'vault root mismatch'
+                assert order_root == expected_order_root, 'order root mismatch'
                 logger.info(f'Verified vault root: 0x{state_update.vault_root}')
                 logger.info(f'Verified order root: 0x{state_update.order_root}')
             else:
-                vault_root = await compute_vault_root(storage)
-                assert vault_root == state_update.vault_root, 'vault root mismatch'
+                vault_root = await compute_vault_root
+                assert vault_root == expected_vault_root, 'vault root mismatch'
                 logger.info(f'Verified vault root: 0x{state_update.vault_root}')
                 logger.info(f'Blindly signing order root: 0x{state_update.order_root}')
 
             batch_info = CommitteeBatchInfo(  # type: ignore
-                bytes.fromhex(state_update.vault_root), bytes.fromhex(state_update.order_root),
-                prev_batch_info.sequence_number + 1)
-
-        await self.storage.set_value(
-            self.committee_batch_info_key(batch_id), batch_info.serialize())
+                expected_vault_root, expected_order_root, prev_batch_info.sequence_number + 1)
 
         # In StarkEx version 4.5, the height of the order tree has changed. For an old committee
         # (i.e. a committee from version 4.0 or below) to work with a version 4.5 backend, the order
@@ -157,18 +188,27 @@ class Committee:
         # order root sent from the AvailabilityGateway (This means that it will only work if the
         # committee is not validating orders).
         # This patch will be deleted in the version 4.5 committee.
-        logger.info("Trying to fetch trades height from the availability gateway")
         # If the API of order_tree_height exists in the Availability Gateway, use it. Otherwise,
         # use ORDERS_MERKLE_HEIGHT from the config (this can happen if the SE
         # Availability Gateway is using an old SE version which doesn't have the
         # order_tree_height API).
+        # The height is only fetched until the first successful response, and is then reused for
+        # the following batches.
+        if self.gateway_trades_height is None:
+            logger.info("Trying to fetch trades height from the availability gateway")
+            try:
+                self.gateway_trades_height = await self.availability_gateway.order_tree_height()
+                logger.info(
+                    f"Trades height received from the Availability Gateway is "
+                    f"{self.gateway_trades_height}. The trades height which is defined in the "
+                    f"config is {self.orders_merkle_height}."
+                )
+            except BadRequest:
+                pass
+
         trades_height = self.orders_merkle_height
-        try:
-            trades_height = await self.availability_gateway.order_tree_height()
-            logger.info(
-                f"Trades height received from the Availability Gateway is {trades_height}. The "
-                f"trades height which is defined in the config is {self.orders_merkle_height}."
-            )
+        if self.gateway_trades_height is not None:
+            trades_height = self.gateway_trades_height
             if self.orders_merkle_height != trades_height:
                 assert not validate_orders, (
                     f"validate_orders is {validate_orders}, but configured trades height "
@@ -178,8 +218,6 @@ class Committee:
                     f"availability gateway, so there is no point in signing and sending the "
                     f"signature."
                 )
-        except BadRequest:
-            pass
 
         logger.info(f'Signing batch with sequence number {batch_info.sequence_number}')
 
@@ -187,7 +225,31 @@ class Committee:
             batch_info.vaults_root, self.vaults_merkle_height, batch_info.orders_root,
             trades_height, batch_info.sequence_number)
         signature = eth.Account._sign_hash(availability_claim, self.account.key).signature.hex()
-        return signature, availability_claim.hex()
+        return signature, availability_claim.hex(), batch_info
+
+    async def store_next_batch_id(self, next_batch_id: int,
+                                  prev_store_task: Optional[asyncio.Task]):
+        """
+        Writes next_batch_id to the storage once prev_store_task is done, so that an older value
+        never overwrites a newer one.
+        """
+        if prev_store_task is not None:
+            await prev_store_task
+        try:
+            await self.storage.set_int(Committee.next_batch_id_key(), next_batch_id)
+        except Exception:
+            logger.error(f'Failed to store next batch id {next_batch_id}:', exc_info=True)
+
+    async def prefetch_batch_data(self, batch_id: int) -> Optional[StateUpdate]:
+        """
+        Fetches the data of the given batch ahead of time. Returns None on failure, in which case
+        the data is fetched again when the batch is processed.
+        """
+        try:
+            return await self.availability_gateway.get_batch_data(batch_id)
+        except Exception:
+            logger.debug(f'Failed to prefetch batch {batch_id}:', exc_info=True)
+            return None
 
     async def run(self):
         next_batch_id = await self.storage.get_int(Committee.next_batch_id_key())
@@ -196,27 +258,58 @@ class Committee:
             next_batch_id = 0
             await self.storage.set_int(Committee.next_batch_id_key(), next_batch_id)
 
-        while not self.stopped:
-            try:
-                availability_update = await self.availability_gateway.get_batch_data(next_batch_id)
-                if availability_update is None:
-                    logger.info(f'Waiting for batch {next_batch_id}')
+        # The next batch id is stored in the background, as processing the next batch does not
+        # depend on it (processing a batch again after a restart is safe).
+        store_task: Optional[asyncio.Task] = None
+        # The data of batch next_batch_id, fetched while the previous batch was processed.
+        prefetch_task: Optional[asyncio.Task] = None
+        try:
+            while not self.stopped:
+                try:
+                    availability_update = None
+                    if prefetch_task is not None:
+                        availability_update = await prefetch_task
+                        prefetch_task = None
+                    if availability_update is None:
+                        availability_update = await self.availability_gateway.get_batch_data(
+                            next_batch_id)
+                    if availability_update is None:
+                        logger.info(f'Waiting for batch {next_batch_id}')
+                        await asyncio.sleep(self.polling_interval)
+                        continue
+                    prefetch_task = asyncio.create_task(
+                        self.prefetch_batch_data(next_batch_id + 1))
+                    # The third party validation is independent of the data availability
+                    # validation, so they run concurrently.
+                    valid, (signature, availability_claim, batch_info) = await gather_or_cancel(
+                        is_valid(availability_update),
+                        self.validate_data_availability(
+                            next_batch_id, availability_update, self.validate_orders))
+                    assert valid, 'Third party validation failed.'
+                    await self.storage.set_value(
+                        self.committee_batch_info_key(next_batch_id), batch_info.serialize())
+                    await self.availability_gateway.send_signature(
+                        next_batch_id, signature, self.account.address, availability_claim)
+                    next_batch_id += 1
+                    store_task = asyncio.create_task(
+                        self.store_next_batch_id(next_batch_id, store_task))
+                except Exception:
+                    logger.error('Got an exception:', exc_info=True)
+                    # The prefetched data is of the batch after next_batch_id.
+                    if prefetch_task is not None:
+                        prefetch_task.cancel()
+                        prefetch_task = None
                     await asyncio.sleep(self.polling_interval)
-                    continue
-                assert await is_valid(availability_update), 'Third party validation failed.'
-                signature, availability_claim = await self.validate_data_availability(
-                    next_batch_id, availability_update, self.validate_orders)
-                await self.availability_gateway.send_signature(
-                    next_batch_id, signature, self.account.address, availability_claim)
-                next_batch_id += 1
-                await self.storage.set_int(Committee.next_batch_id_key(), next_batch_id)
-            except Exception:
-                logger.error('Got an exception:', exc_info=True)
-                await asyncio.sleep(self.polling_interval)
+        finally:
+            if prefetch_task is not None:
+                prefetch_task.cancel()
+            if store_task is not None:
+                await store_task
 
 
 async def main():
-    config = yaml.safe_load(open('/config.yml', 'r'))
+    with open('/config.yml', 'r') as config_file:
+        config = yaml.safe_load(config_file)
     private_key_path = os.environ.get(
         'PRIVATE_KEY_PATH', config.get('PRIVATE_KEY_PATH', '/private_key.txt'))
     with open(private_key_path, 'r') as private_key_file:
@@ -231,29 +324,43 @@ async def main():
     certificates_path = os.environ.get(
         'CERTIFICATES_PATH', config.get('CERTIFICATES_PATH'))
 
-    requests_kwargs = {}
+    ssl_context = None
     if certificates_path is not None:
-        requests_kwargs = {'cert': (os.path.join(certificates_path, 'user.crt'),
-                                    os.path.join(certificates_path, 'user.key')),
-                           'verify': os.path.join(certificates_path, 'server.crt')}
+        ssl_context = ssl.create_default_context(
+            cafile=os.path.join(certificates_path, 'server.crt'))
+        ssl_context.load_cert_chain(os.path.join(certificates_path, 'user.crt'),
+                                    os.path.join(certificates_path, 'user.key'))
 
     availability_gateway = AvailabilityGatewayClient(
-        availability_gw_endpoint, requests_kwargs=requests_kwargs)
+        availability_gw_endpoint, ssl_context=ssl_context,
+        validate_schema=bool(config.get('VALIDATE_BATCH_DATA_SCHEMA', False)))
     logger.info(f'Using {availability_gw_endpoint} as an availability gateway')
 
     workers = int(os.environ.get('HASH_WORKERS', os.cpu_count()))
     logger.info(f'Using {workers} hashing process')
-
-    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
-        async def async_hash_func(x, y):
-            return await asyncio.get_event_loop().run_in_executor(pool, pedersen_hash_func, x, y)
+    hash_cache_size = int(config.get('HASH_CACHE_SIZE', 2**16))
+
+    # The hashing processes are forked from this process, and inherit the precomputed tables of
+    # fast_pedersen_hash instead of building their own. Freezing the existing objects keeps the
+    # garbage collector of the workers from writing to the pages of these tables, which would
+    # make each worker hold a private copy of them.
+    # The fork start method is requested explicitly, as it is not the default on all platforms.
+    gc.freeze()
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
         committee = Committee(
             config=config,
             private_key=private_key,
             storage=storage,
             merkle_storage=storage,
-            hash_func=async_hash_func, availability_gateway=availability_gateway)
-        await committee.run()
+            hash_func=CachedHashFunc(
+                ParallelHashFunc(pool, pedersen_hash_batch, n_workers=workers),
+                max_size=hash_cache_size),
+            availability_gateway=availability_gateway)
+        try:
+            await committee.run()
+        finally:
+            await availability_gateway.close()
 
 
 if __name__ == '__main__':
@@ -1,13 +1,15 @@
+import asyncio
 import json
 import os
 
 import pytest
 
 from starkware.crypto.signature.fast_pedersen_hash import async_pedersen_hash_func
-from starkware.objects.availability import BatchDataResponse
+from starkware.objects.availability import BatchDataResponse, StateUpdate
 from starkware.storage.test_utils import MockStorage
 
-from .committee import Committee
+from . import committee as committee_module
+from .committee import Committee, CommitteeBatchInfo, gather_or_cancel
 
 
 ORDER_TREE_HEIGHT = 63
@@ -15,18 +17,33 @@ ORDER_TREE_HEIGHT = 63
 
 class AvailabilityGatewayClientMock:
     def __init__(self):
-        pass
+        # Maps batch ids to the data returned by get_batch_data().
+        self.batches = {}
+        self.requested_batch_ids = []
+        # Maps batch ids to the claims that were signed.
+        self.claims = {}
+        # Number of the following send_signature() calls that fail.
+        self.n_signature_failures = 0
 
     async def order_tree_height(self) -> int:
         return ORDER_TREE_HEIGHT
 
+    async def get_batch_data(self, batch_id):
+        self.requested_batch_ids.append(batch_id)
+        return self.batches.get(batch_id)
 
-@pytest.fixture
-def committee():
+    async def send_signature(self, batch_id, sig, member_key, claim_hash):
+        if self.n_signature_failures > 0:
+            self.n_signature_failures -= 1
+            raise Exception('Failed to send the signature.')
+        self.claims[batch_id] = claim_hash
+
+
+def create_committee():
     config = {
         'VAULTS_MERKLE_HEIGHT': 31,
         'ORDERS_MERKLE_HEIGHT': ORDER_TREE_HEIGHT,
-        'POLLING_INTERVAL': 1,
+        'POLLING_INTERVAL': 0.01,
     }
 
     return Committee(
@@ -38,6 +55,11 @@ def committee():
         availability_gateway=AvailabilityGatewayClientMock())
 
 
+@pytest.fixture
+def committee():
+    return create_committee()
+
+
 @pytest.fixture
 def state_update():
     # batch_info.json is the batch availability data for batch-0 from end_to_end_test.
@@ -53,6 +75,14 @@ def state_update():
     return state_update
 
 
+@pytest.fixture
+def next_state_update(state_update):
+    # A batch that follows the batch of state_update, without changes.
+    return StateUpdate(
+        vaults={}, orders={}, vault_root=state_update.vault_root,
+        order_root=state_update.order_root, prev_batch_id=0)
+
+
 @pytest.fixture
 def expected_signature():
     # The expected signature on the roots in the used config file.
@@ -68,15 +98,31 @@ async def test_initialization(committee):
     assert await committee.storage.get_value(committee.committee_batch_info_key(-1)) is None
     assert await committee.storage.get_int(Committee.next_batch_id_key()) is None
     await committee.compute_initial_batch_info()
-    batch_info = json.loads(
+    batch_info = CommitteeBatchInfo.deserialize(
         await committee.storage.get_value(committee.committee_batch_info_key(-1)))
-    assert batch_info['sequence_number'] == -1
-    assert batch_info['vaults_root'] == \
+    assert batch_info.sequence_number == -1
+    assert batch_info.vaults_root.hex() == \
         '0075364111a7a336756626d19fc8ec8df6328a5e63681c68ffaa312f6bf98c5c'
-    assert batch_info['orders_root'] == \
+    assert batch_info.orders_root.hex() == \
         '01bb0b0bdb803c733cf692a324a31e8e7749a9fdfb597d74e71c604795e659ed'
 
 
+def test_batch_info_serialization():
+    """
+    Test CommitteeBatchInfo serialization, including batch info stored as JSON by older versions.
+    """
+    batch_info = CommitteeBatchInfo(
+        vaults_root=bytes(range(32)), orders_root=bytes(range(32, 64)), sequence_number=-1)
+    assert CommitteeBatchInfo.deserialize(batch_info.serialize()) == batch_info
+
+    legacy_data = json.dumps({
+        'vaults_root': batch_info.vaults_root.hex(),
+        'orders_root': batch_info.orders_root.hex(),
+        'sequence_number': -1,
+    }).encode('ascii')
+    assert CommitteeBatchInfo.deserialize(legacy_data) == batch_info
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize('validate_orders', [True, False])
 @pytest.mark.parametrize('valid_vault_root', [True, False])
@@ -101,5 +147,175 @@ async def test_validate_data_availability(committee, state_update, expected_sign
             await committee.validate_data_availability(0, state_update, validate_orders)
 
     else:
-        signature, _ = await committee.validate_data_availability(0, state_update, validate_orders)
+        signature, _, batch_info = await committee.validate_data_availability(
+            0, state_update, validate_orders)
         assert signature == expected_signature
+        assert batch_info.sequence_number == 0
+        assert batch_info.vaults_root.hex() == state_update.vault_root
+        assert batch_info.orders_root.hex() == state_update.order_root
+
+
+async def run_committee(committee, stop_condition, timeout=60):
+    """
+    Runs the committee until stop_condition() holds, and then stops it.
+    """
+    run_task = asyncio.create_task(committee.run())
+
+    async def wait_for_condition():
+        while not stop_condition():
+            if run_task.done():
+                await run_task
+                assert False, 'The committee stopped unexpectedly.'
+            await asyncio.sleep(0.01)
+
+    try:
+        await asyncio.wait_for(wait_for_condition(), timeout)
+    finally:
+        committee.stop()
+        await run_task
+
+
+@pytest.mark.asyncio
+async def test_gather_or_cancel():
+    """
+    Tests that gather_or_cancel() cancels the other awaitables when one of them fails.
+    """
+    assert await gather_or_cancel(asyncio.sleep(0, 1), asyncio.sleep(0, 2)) == [1, 2]
+
+    sleep_task = asyncio.ensure_future(asyncio.sleep(10))
+
+    async def fail():
+        raise ValueError('failed')
+
+    with pytest.raises(ValueError, match='failed'):
+        await gather_or_cancel(sleep_task, fail())
+    assert sleep_task.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_run_rejected_batch(committee, state_update, monkeypatch):
+    """
+    Tests that a batch rejected by is_valid() is neither stored nor signed.
+    """
+    n_is_valid_calls = 0
+
+    async def reject(state_update):
+        nonlocal n_is_valid_calls
+        n_is_valid_calls += 1
+        return False
+
+    monkeypatch.setattr(committee_module, 'is_valid', reject)
+    committee.availability_gateway.batches[0] = state_update
+    await run_committee(committee, lambda: n_is_valid_calls >= 2)
+
+    assert committee.availability_gateway.claims == {}
+    assert await committee.storage.get_value(committee.committee_batch_info_key(0)) is None
+    assert await committee.storage.get_int(Committee.next_batch_id_key()) == 0
+
+
+@pytest.mark.asyncio
+async def test_run_prefetch(committee, state_update, next_state_update):
+    """
+    Tests that the data of the next batch is prefetched, and not fetched again.
+    """
+    gateway = committee.availability_gateway
+    gateway.batches = {0: state_update, 1: next_state_update}
+    await run_committee(committee, lambda: len(gateway.claims) == 2)
+
+    assert gateway.requested_batch_ids[:2] == [0, 1]
+    assert gateway.requested_batch_ids.count(1) == 1
+    assert await committee.storage.get_int(Committee.next_batch_id_key()) == 2
+
+
+@pytest.mark.asyncio
+async def test_run_prefetch_error(committee, state_update, next_state_update):
+    """
+    Tests that when processing a batch fails, the data prefetched for the following batch is
+    dropped and fetched again.
+    """
+    reference_committee = create_committee()
+    reference_committee.availability_gateway.batches = {0: state_update, 1: next_state_update}
+    await run_committee(
+        reference_committee, lambda: len(reference_committee.availability_gateway.claims) == 2)
+
+    gateway = committee.availability_gateway
+    # The gateway first serves data of batch 1 that does not match the reference run, and replaces
+    # it when sending the signature of batch 0 fails.
+    gateway.batches = {
+        0: state_update,
+        1: StateUpdate(
+            vaults={}, orders={}, vault_root=next_state_update.vault_root, order_root='00' * 32,
+            prev_batch_id=0),
+    }
+    gateway.n_signature_failures = 1
+    send_signature = gateway.send_signature
+
+    async def send_signature_and_update_batch(batch_id, *args):
+        try:
+            await send_signature(batch_id, *args)
+        except Exception:
+            gateway.batches[1] = next_state_update
+            raise
+
+    gateway.send_signature = send_signature_and_update_batch
+    await run_committee(committee, lambda: len(gateway.claims) == 2)
+
+    # Batch 1 was prefetched while batch 0 was processed for the first time, and fetched again
+    # after the failure.
+    assert gateway.requested_batch_ids[:4] == [0, 1, 0, 1]
+    assert gateway.claims == reference_committee.availability_gateway.claims
+
+
+class SlowFailingStorage(MockStorage):
+    """
+    A MockStorage whose set_int() of a value sleeps for the given delay, or fails if the value is in
+    failing_values.
+    """
+
+    def __init__(self, delays, failing_values=()):
+        super().__init__()
+        self.delays = delays
+        self.failing_values = failing_values
+        self.written_values = []
+
+    async def set_int(self, key: bytes, value: int):
+        await asyncio.sleep(self.delays.get(value, 0))
+        if value in self.failing_values:
+            raise Exception(f'Failed to write {value}.')
+        self.written_values.append(value)
+        await super().set_int(key, value)
+
+
+@pytest.mark.asyncio
+async def test_store_next_batch_id_order(committee):
+    """
+    Tests that the background writes of the next batch id are done in order, even when the earlier
+    writes are slower.
+    """
+    committee.storage = SlowFailingStorage(delays={1: 0.03, 2: 0.02, 3: 0.01})
+    store_task = None
+    for next_batch_id in range(1, 5):
+        store_task = asyncio.create_task(committee.store_next_batch_id(next_batch_id, store_task))
+    await store_task
+
+    assert committee.storage.written_values == [1, 2, 3, 4]
+    assert await committee.storage.get_int(Committee.next_batch_id_key()) == 4
+
+
+@pytest.mark.asyncio
+async def test_store_next_batch_id_failure(committee, caplog):
+    """
+    Tests that a failure to write the next batch id is logged, and does not stop the following
+    writes.
+    """
+    committee.storage = SlowFailingStorage(delays={}, failing_values={1, 3})
+    store_task = None
+    for next_batch_id in range(1, 4):
+        store_task = asyncio.create_task(committee.store_next_batch_id(next_batch_id, store_task))
+    await store_task
+
+    assert committee.storage.written_values == [2]
+    error_messages = [
+        record.getMessage() for record in caplog.records if record.levelname == 'ERROR']
+    assert error_messages == [
+        'Failed to store next batch id 1:', 'Failed to store next batch id 3:']
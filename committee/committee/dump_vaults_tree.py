@@ -11,6 +11,13 @@ from starkware.objects.state import VaultStateFact
 from starkware.storage.merkle_tree import MerkleTree
 from starkware.storage.storage import Storage
 
+# Number of rows that are accumulated before they are written to the output files.
+WRITE_CHUNK_SIZE = 4096
+# Number of leaves that are fetched from the storage concurrently.
+LEAF_FETCH_CHUNK_SIZE = 256
+# Buffer size of the output files.
+OUTPUT_BUFFER_SIZE = 2**20
+
 
 def parse_args():
     """
@@ -55,25 +62,40 @@ async def dump_vaults_tree(tree: MerkleTree, nodes_file: TextIO, vaults_file: Te
 
     nodes_writer = csv.writer(nodes_file, delimiter=',')
     vaults_writer = csv.writer(vaults_file, delimiter=',')
+    nodes_rows = []
+    # (vault_id, root) of the non-empty leaves that were not fetched yet.
+    pending_leaves = []
+
+    async def write_rows():
+        leaves = await asyncio.gather(
+            *(VaultStateFact.get(tree.storage, root) for _, root in pending_leaves))
+        nodes_writer.writerows(nodes_rows)
+        vaults_writer.writerows(
+            [vault_id, data.stark_key, data.token, data.balance]
+            for (vault_id, _), data in zip(pending_leaves, leaves))
+        nodes_rows.clear()
+        pending_leaves.clear()
 
     # Traverse the tree in DFS manner,
     # obtaining data from leaves, and ignoring empty subtrees.
-    async for index, node in tree.dfs(exclude_set=set(empty_trees)):
-        data = node.root.hex()
-        nodes_writer.writerow([index, data])
+    async for index, node in tree.dfs(exclude_set=frozenset(empty_trees)):
+        nodes_rows.append([index, node.root.hex()])
 
         if node.height == 0 and node.root != empty_trees[0]:
-            data = await VaultStateFact.get(tree.storage, node.root)
-            vault_id = index - 2 ** tree.height
-            vaults_writer.writerow(
-                [vault_id, data.stark_key, data.token, data.balance])
+            pending_leaves.append((index - 2 ** tree.height, node.root))
+
+        if len(nodes_rows) >= WRITE_CHUNK_SIZE or len(pending_leaves) >= LEAF_FETCH_CHUNK_SIZE:
+            await write_rows()
+
+    await write_rows()
 
 
 async def main():
     args = parse_args()
 
     if args.config_file:
-        config = yaml.safe_load(open(args.config_file))
+        with open(args.config_file) as config_file:
+            config = yaml.safe_load(config_file)
     else:
         # default configuration assuming port forwarding.
         config = yaml.safe_load("""\
@@ -93,7 +115,8 @@ STORAGE:
     tree = MerkleTree(root_as_int.to_bytes(32, 'big'), args.height,
                       storage, async_pedersen_hash_func)
 
-    with open(args.nodes_file, 'w') as nodes_file, open(args.vaults_file, 'w') as vaults_file:
+    with open(args.nodes_file, 'w', newline='', buffering=OUTPUT_BUFFER_SIZE) as nodes_file, \
+            open(args.vaults_file, 'w', newline='', buffering=OUTPUT_BUFFER_SIZE) as vaults_file:
         await dump_vaults_tree(tree, nodes_file, vaults_file)
 
 
@@ -0,0 +1,96 @@
+import asyncio
+from collections import deque
+from concurrent.futures import Executor
+from typing import Awaitable, Callable, Deque, List, Sequence, Tuple
+
+from starkware.storage.lru_cache import LRUCache
+
+
+class ParallelHashFunc:
+    """
+    An async hash function (to be used as the hash_func of a MerkleTree) that computes the hashes
+    using an executor (typically a ProcessPoolExecutor).
+
+    Instead of submitting each hash separately, at most n_workers batches are being computed at any
+    given time, and hash requests that are issued in the meantime (for example, by the different
+    branches of MerkleTree.update()) are collected and submitted together once a worker is
+    available. This way the inter-process communication overhead is paid per batch rather than per
+    hash. Batches are limited to max_batch_size hashes, so that a large layer of a tree is spread
+    between the workers as they become available instead of being assigned to the workers that are
+    free at the moment it is requested.
+
+    batch_hash_func should be picklable and compute the hashes of a sequence of (x, y) pairs.
+    """
+
+    def __init__(
+            self, executor: Executor,
+            batch_hash_func: Callable[[Sequence[Tuple[bytes, bytes]]], List[bytes]],
+            n_workers: int, max_batch_size: int = 1024):
+        assert n_workers > 0
+        assert max_batch_size > 0
+        self.executor = executor
+        self.batch_hash_func = batch_hash_func
+        self.n_workers = n_workers
+        self.max_batch_size = max_batch_size
+        self.pending: Deque[Tuple[bytes, bytes, asyncio.Future]] = deque()
+        self.n_running_batches = 0
+
+    async def __call__(self, x: bytes, y: bytes) -> bytes:
+        loop = asyncio.get_event_loop()
+        if len(self.pending) == 0:
+            # Let the other ready tasks issue their hash requests before submitting.
+            loop.call_soon(self.submit_pending)
+        future = loop.create_future()
+        self.pending.append((x, y, future))
+        return await future
+
+    def submit_pending(self):
+        n_free_workers = self.n_workers - self.n_running_batches
+        if n_free_workers == 0 or len(self.pending) == 0:
+            # The pending requests will be submitted once a running batch is done.
+            return
+        batch_size = min(-(-len(self.pending) // n_free_workers), self.max_batch_size)
+        while self.n_running_batches < self.n_workers and len(self.pending) > 0:
+            self.submit_batch([
+                self.pending.popleft() for _ in range(min(batch_size, len(self.pending)))])
+
+    def submit_batch(self, batch: List[Tuple[bytes, bytes, asyncio.Future]]):
+        def set_results(batch_future: asyncio.Future):
+            self.n_running_batches -= 1
+            self.submit_pending()
+            try:
+                results = batch_future.result()
+            except Exception as ex:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(ex)
+                return
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+        self.n_running_batches += 1
+        batch_future = asyncio.get_event_loop().run_in_executor(
+            self.executor, self.batch_hash_func, [(x, y) for x, y, _ in batch])
+        batch_future.add_done_callback(set_results)
+
+
+class CachedHashFunc:
+    """
+    Wraps an async hash function with an LRU cache of the recently computed hashes.
+
+    Hash computations tend to repeat between batches, e.g., the leaf hashes of vaults with the same
+    stark_key and token, and nodes on the paths of vaults that are updated by consecutive batches.
+    """
+
+    def __init__(self, hash_func: Callable[[bytes, bytes], Awaitable[bytes]], max_size: int):
+        self.hash_func = hash_func
+        self.cache = LRUCache(max_size)
+
+    async def __call__(self, x: bytes, y: bytes) -> bytes:
+        key = x + y
+        result = self.cache.get(key)
+        if result is None:
+            result = await self.hash_func(x, y)
+            self.cache[key] = result
+        return result
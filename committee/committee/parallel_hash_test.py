@@ -0,0 +1,49 @@
+import asyncio
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from starkware.crypto.signature import EC_ORDER
+from starkware.crypto.signature.fast_pedersen_hash import pedersen_hash_batch, pedersen_hash_func
+
+from .parallel_hash import CachedHashFunc, ParallelHashFunc
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('max_batch_size', [1, 3, 1024])
+async def test_parallel_hash_func(max_batch_size):
+    pairs = [
+        (random.randint(0, EC_ORDER - 1).to_bytes(32, 'big'),
+         random.randint(0, EC_ORDER - 1).to_bytes(32, 'big'))
+        for _ in range(10)]
+
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        hash_func = ParallelHashFunc(
+            pool, pedersen_hash_batch, n_workers=2, max_batch_size=max_batch_size)
+        results = await asyncio.gather(*(hash_func(x, y) for x, y in pairs))
+        # Check that the hash function is usable after the pending requests were submitted.
+        assert await hash_func(*pairs[0]) == results[0]
+
+    assert results == [pedersen_hash_func(x, y) for x, y in pairs]
+
+
+@pytest.mark.asyncio
+async def test_cached_hash_func():
+    calls = []
+
+    async def hash_func(x, y):
+        calls.append((x, y))
+        return pedersen_hash_func(x, y)
+
+    cached_hash_func = CachedHashFunc(hash_func, max_size=2)
+    zero, one, two = (i.to_bytes(32, 'big') for i in range(3))
+    assert await cached_hash_func(zero, one) == pedersen_hash_func(zero, one)
+    assert await cached_hash_func(zero, one) == pedersen_hash_func(zero, one)
+    assert calls == [(zero, one)]
+
+    # Evict (zero, one) from the cache.
+    await cached_hash_func(one, two)
+    await cached_hash_func(two, zero)
+    assert await cached_hash_func(zero, one) == pedersen_hash_func(zero, one)
+    assert calls == [(zero, one), (one, two), (two, zero), (zero, one)]
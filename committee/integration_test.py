@@ -48,18 +48,25 @@ async def dump_vaults_tree_test(storage_config):
     # Compute the indices of all the nodes in the authentication path.
     authentication_path_indices = [(index >> (height - 1 - depth)) ^ 1 for depth in range(height)]
     path = {}
+    remaining_indices = set(authentication_path_indices) | {index}
 
     # Go over the csv file and collect the following hashes:
     # 1. vault_hash corresponding to vault_id
     # 2. hashes of nodes in the authentication path for the vault in 1.
+    # Stop as soon as all of them are found.
     for row in reader:
         row_number = int(row[0])
+        if row_number not in remaining_indices:
+            continue
+        remaining_indices.remove(row_number)
         if row_number == index:
             vault_hash = row[1]
-        if row_number in authentication_path_indices:
+        else:
             path[row_number] = row[1]
+        if len(remaining_indices) == 0:
+            break
 
-    assert sorted(path.keys()) == authentication_path_indices
+    assert len(remaining_indices) == 0, f'Nodes {sorted(remaining_indices)} are missing.'
 
     vault_data = None
 
@@ -69,6 +76,7 @@ async def dump_vaults_tree_test(storage_config):
         row_number = int(row[0])
         if row_number == index - 2**31:
             vault_data = VaultStateFact(int(row[1]), int(row[2]), int(row[3]))
+            break
 
     computed_vault_hash = (await vault_data._hash(async_pedersen_hash_func)).hex()
     assert computed_vault_hash == vault_hash,  f'{computed_vault_hash} != {vault_hash}'
@@ -118,7 +126,8 @@ def test_committee():
             n_batches_validated = int(resp.text)
 
         # Test dump_db flow after the db is initialized and before we bring it down.
-        config = yaml.safe_load(open(os.path.join(workdir, 'config.yml'), 'r'))
+        with open(os.path.join(workdir, 'config.yml'), 'r') as config_file:
+            config = yaml.safe_load(config_file)
         config['STORAGE']['config']['hosts'] = ['localhost:3000']
         asyncio.run(dump_vaults_tree_test(config['STORAGE']))
 
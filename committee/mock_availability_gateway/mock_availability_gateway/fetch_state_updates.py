@@ -1,4 +1,5 @@
 import argparse
+import asyncio
 import json
 import os
 
@@ -8,7 +9,7 @@ from starkware.objects.availability import BatchDataResponse
 DIR = os.path.dirname(__file__)
 
 
-def main():
+async def main():
     """
     Fetches StateUpdate records from a StarkEx AvailabilityGateway and dumps them to a file.
     """
@@ -20,17 +21,20 @@ def main():
                         help='Number of batchs to fetch')
     args = parser.parse_args()
 
-    client = AvailabilityGatewayClient()
+    client = AvailabilityGatewayClient(args.gateway_url)
 
     updates_list = []
-    for batch_id in range(args.n_batches):
-        info = client.get_batch_data(batch_id)
-        assert info is not None, f'batch {batch_id} is not availabile'
-        updates_list.append(info)
+    try:
+        for batch_id in range(args.n_batches):
+            info = await client.get_batch_data(batch_id)
+            assert info is not None, f'batch {batch_id} is not availabile'
+            updates_list.append(BatchDataResponse(update=info))
+    finally:
+        await client.close()
 
     with open(args.filename, 'w') as json_file:
         json.dump(BatchDataResponse.Schema().dump(updates_list, many=True), json_file, indent=4)
         json_file.write('\n')
 
 
-main()
+asyncio.run(main())
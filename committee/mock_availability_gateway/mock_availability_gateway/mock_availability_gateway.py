@@ -1,12 +1,12 @@
 import asyncio
 import datetime
-import json
 import logging
 import logging.config
 import os
 import sys
 import time
 
+import orjson
 import yaml
 from aiohttp import web
 
@@ -24,8 +24,11 @@ class MockAvailabilityGateway():
     """
 
     def __init__(self):
-        with open(os.path.join(DIR, 'data.json'), 'r') as json_file:
-            self.data = json.load(json_file)
+        with open(os.path.join(DIR, 'data.json'), 'rb') as json_file:
+            self.data = orjson.loads(json_file.read())
+        # The data is static, so the responses are serialized once.
+        self.serialized_data = [orjson.dumps(batch_data) for batch_data in self.data]
+        self.serialized_empty_batch = orjson.dumps({'update': None})
 
         self.batch_sent = {}
         self.batch_validated = {}
@@ -40,14 +43,15 @@ class MockAvailabilityGateway():
         stark_assert(batch_id.isdigit(), StarkMsg.INVALID_REQUEST, 'batch_id is not a number')
 
         batch_id = int(batch_id)
-        batch_data_response = self.data[batch_id] if batch_id < len(self.data) else {'update': None}
+        batch_data_response = self.serialized_data[batch_id] if batch_id < len(self.data) else \
+            self.serialized_empty_batch
 
         if batch_id in self.batch_sent and batch_id < len(self.data):
             logger.warn(f'Data for batch {batch_id} was requested more than once')
         else:
             self.batch_sent[batch_id] = time.time()
 
-        return web.Response(text=json.dumps(batch_data_response))
+        return web.Response(body=batch_data_response, content_type='application/json')
 
     async def approve_new_roots(self, request):
         sig_data = CommitteeSignature.Schema().loads(await request.text())
@@ -91,7 +95,8 @@ async def make_app():
 
 
 async def main():
-    config = yaml.safe_load(open('/config.yml', 'r'))
+    with open('/config.yml', 'r') as config_file:
+        config = yaml.safe_load(config_file)
     logging.config.dictConfig(config.get('LOGGING', {}))
     app = await make_app()
     runner = web.AppRunner(app)
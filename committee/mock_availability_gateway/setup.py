@@ -16,6 +16,7 @@ setup(
     packages=find_packages(),
     install_requires=[
         'aiohttp==3.6.2',
+        'orjson==3.8.3',
         'PyYAML==5.1',
         'Web3==5.2.2',
     ],
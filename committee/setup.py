@@ -6,11 +6,12 @@ setup(
     packages=find_packages(),
     install_requires=[
         'aerospike==4.0.0',
+        'aiohttp==3.6.2',
         'aioredis==1.2.0',
         'fastecdsa==1.7.2',
         'marshmallow-dataclass==7.1.0',
         'marshmallow==3.2.1',
+        'orjson==3.8.3',
         'PyYAML==5.1',
-        'requests == 2.22.0',
     ]
 )
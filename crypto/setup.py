@@ -14,6 +14,7 @@ setup(
         'mpmath==1.0.0',
         'sympy==1.6',
         'ecdsa==0.16.0',
+        'fastecdsa==1.7.2',
     ],
     package_data={
         '': ['signature/pedersen_params.json']
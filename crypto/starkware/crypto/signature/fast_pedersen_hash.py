@@ -1,8 +1,12 @@
+from typing import List, Optional, Sequence, Tuple
+
 from fastecdsa.curve import Curve
 from fastecdsa.point import Point
 
-from starkware.crypto.signature import (
-    ALPHA, BETA, CONSTANT_POINTS, EC_ORDER, FIELD_PRIME, N_ELEMENT_BITS_HASH, SHIFT_POINT)
+from .math_utils import div_mod
+from .signature import (
+    ALPHA, BETA, CONSTANT_POINTS, EC_ORDER, FIELD_PRIME, N_ELEMENT_BITS_HASH, SHIFT_POINT,
+    pedersen_hash)
 
 curve = Curve(
     'Curve0',
@@ -14,23 +18,80 @@ curve = Curve(
 
 LOW_PART_BITS = 248
 LOW_PART_MASK = 2**248 - 1
+HIGH_PART_BITS = N_ELEMENT_BITS_HASH - LOW_PART_BITS
 HASH_SHIFT_POINT = Point(*SHIFT_POINT, curve=curve)
 P_0 = Point(*CONSTANT_POINTS[2], curve=curve)
 P_1 = Point(*CONSTANT_POINTS[2 + LOW_PART_BITS], curve=curve)
 P_2 = Point(*CONSTANT_POINTS[2 + N_ELEMENT_BITS_HASH], curve=curve)
 P_3 = Point(*CONSTANT_POINTS[2 + N_ELEMENT_BITS_HASH + LOW_PART_BITS], curve=curve)
 
+# Multiplications of the constant points are done using precomputed tables of the multiples of
+# each point, processing WINDOW_BITS bits of the scalar at a time.
+WINDOW_BITS = 8
+WINDOW_MASK = 2**WINDOW_BITS - 1
+
+# A table of point multiples. table[i][j] is j * 2**(WINDOW_BITS * i) * point (table[i][0] is not
+# used).
+PointTable = List[List[Optional[Point]]]
+
 
-def process_single_element(element: bytes, p1, p2) -> Point:
-    assert len(element) == 32, 'Unexpected element length'
+def precompute_point_table(point: Point, n_bits: int) -> PointTable:
+    """
+    Returns the table of multiples of point, required for multiplying it by n_bits-bit scalars.
+    """
+    table = []
+    for i in range(0, n_bits, WINDOW_BITS):
+        window: List[Optional[Point]] = [None, point]
+        for _ in range(2 ** min(WINDOW_BITS, n_bits - i) - 2):
+            window.append(window[-1] + point)
+        table.append(window)
+        point = point * 2**WINDOW_BITS
+    return table
 
-    val = int.from_bytes(element, 'big', signed=False)
-    assert val < EC_ORDER, 'Element int value >= EC_ORDER'
 
-    high_nibble = val >> LOW_PART_BITS
-    low_part = val & LOW_PART_MASK
+P_0_TABLE = precompute_point_table(P_0, LOW_PART_BITS)
+P_1_TABLE = precompute_point_table(P_1, HIGH_PART_BITS)
+P_2_TABLE = precompute_point_table(P_2, LOW_PART_BITS)
+P_3_TABLE = precompute_point_table(P_3, HIGH_PART_BITS)
 
-    return low_part * p1 + high_nibble * p2
+
+def add_multiple(point: Point, scalar: int, table: PointTable) -> Point:
+    """
+    Returns point + scalar * P, where table is the precomputed table of P.
+    """
+    for window in table:
+        if scalar == 0:
+            # The remaining windows are all zero.
+            break
+        digit = scalar & WINDOW_MASK
+        if digit != 0:
+            point = point + window[digit]
+        scalar >>= WINDOW_BITS
+    assert scalar == 0
+    return point
+
+
+def process_single_element(element: int, point: Point, low_part_table: PointTable,
+                           high_part_table: PointTable) -> Point:
+    """
+    Returns point + low_part * P1 + high_nibble * P2, where low_part_table and high_part_table are
+    the precomputed tables of P1 and P2, respectively.
+    """
+    assert 0 <= element < EC_ORDER, 'Element int value >= EC_ORDER'
+
+    high_nibble = element >> LOW_PART_BITS
+    low_part = element & LOW_PART_MASK
+
+    point = add_multiple(point, low_part, low_part_table)
+    return add_multiple(point, high_nibble, high_part_table)
+
+
+def pedersen_hash_as_int(x: int, y: int) -> int:
+    """
+    Same as pedersen_hash_func, for elements given as ints.
+    """
+    point = process_single_element(x, HASH_SHIFT_POINT, P_0_TABLE, P_1_TABLE)
+    return process_single_element(y, point, P_2_TABLE, P_3_TABLE).x
 
 
 def pedersen_hash_func(x: bytes, y: bytes) -> bytes:
@@ -41,8 +102,115 @@ def pedersen_hash_func(x: bytes, y: bytes) -> bytes:
     where x_low is the 248 low bits of x, x_high is the 4 high bits of x and similarly for y.
     shift_point, P_0, P_1, P_2, P_3 are constant points generated from the digits of pi.
     """
-    return (HASH_SHIFT_POINT + process_single_element(x, P_0, P_1) +
-            process_single_element(y, P_2, P_3)).x.to_bytes(32, 'big')
+    assert len(x) == 32 and len(y) == 32, 'Unexpected element length'
+    return pedersen_hash_as_int(
+        int.from_bytes(x, 'big', signed=False),
+        int.from_bytes(y, 'big', signed=False)).to_bytes(32, 'big')
+
+
+def fast_pedersen_hash(x: int, y: int) -> int:
+    """
+    Same as signature.pedersen_hash(x, y), using pedersen_hash_as_int.
+    Falls back to signature.pedersen_hash for elements that pedersen_hash_as_int does not accept.
+    """
+    if x >= EC_ORDER or y >= EC_ORDER:
+        return pedersen_hash(x, y)
+    return pedersen_hash_as_int(x, y)
+
+
+# The precomputed point tables, with the points as (x, y) tuples, for batch_add_multiples.
+AffinePointTable = List[List[Optional[Tuple[int, int]]]]
+
+
+def to_affine_table(table: PointTable) -> AffinePointTable:
+    return [[None if point is None else (point.x, point.y) for point in window]
+            for window in table]
+
+
+P_0_AFFINE_TABLE = to_affine_table(P_0_TABLE)
+P_1_AFFINE_TABLE = to_affine_table(P_1_TABLE)
+P_2_AFFINE_TABLE = to_affine_table(P_2_TABLE)
+P_3_AFFINE_TABLE = to_affine_table(P_3_TABLE)
+
+# Batches smaller than this are hashed one pair at a time, as a batch inversion costs more than
+# the additions it saves.
+MIN_BATCH_SIZE = 4
+
+
+def batch_add_multiples(
+        xs: List[int], ys: List[int], scalars: List[int], table: AffinePointTable):
+    """
+    Sets (xs[i], ys[i]) to (xs[i], ys[i]) + scalars[i] * P for every i, where table is the affine
+    table of P.
+    The additions of each window share a single modular inversion (Montgomery's trick), which is
+    what makes this faster than adding the points one by one.
+    Raises ZeroDivisionError if one of the additions is a doubling or results in the point at
+    infinity (which happens with negligible probability).
+    """
+    for window in table:
+        if not any(scalars):
+            # The remaining windows are all zero.
+            break
+        digits = [scalar & WINDOW_MASK for scalar in scalars]
+        scalars = [scalar >> WINDOW_BITS for scalar in scalars]
+        indices = [i for i, digit in enumerate(digits) if digit != 0]
+        if len(indices) == 0:
+            continue
+
+        # prefix_products[k] is the product of the x differences of the first k additions.
+        diffs = []
+        prefix_products = [1]
+        for i in indices:
+            diff = (window[digits[i]][0] - xs[i]) % FIELD_PRIME  # type: ignore
+            diffs.append(diff)
+            prefix_products.append(prefix_products[-1] * diff % FIELD_PRIME)
+        if prefix_products[-1] == 0:
+            raise ZeroDivisionError('Unexpected doubling in batch_add_multiples.')
+        inverse = div_mod(1, prefix_products[-1], FIELD_PRIME)
+
+        for k in range(len(indices) - 1, -1, -1):
+            i = indices[k]
+            # inverse is the inverse of prefix_products[k + 1].
+            diff_inverse = inverse * prefix_products[k] % FIELD_PRIME
+            inverse = inverse * diffs[k] % FIELD_PRIME
+            x, y = window[digits[i]]  # type: ignore
+            slope = (y - ys[i]) * diff_inverse % FIELD_PRIME
+            new_x = (slope * slope - xs[i] - x) % FIELD_PRIME
+            ys[i] = (slope * (xs[i] - new_x) - ys[i]) % FIELD_PRIME
+            xs[i] = new_x
+    assert not any(scalars)
+
+
+def pedersen_hash_batch(pairs: Sequence[Tuple[bytes, bytes]]) -> List[bytes]:
+    """
+    Computes pedersen_hash_func for each of the given (x, y) pairs.
+    Useful for sending many hash computations to a worker process at once.
+
+    The hashes are computed together, so that the EC additions of all of them share modular
+    inversions (see batch_add_multiples).
+    """
+    if len(pairs) < MIN_BATCH_SIZE:
+        return [pedersen_hash_func(x, y) for x, y in pairs]
+
+    elements = []
+    for pair in pairs:
+        for element in pair:
+            assert len(element) == 32, 'Unexpected element length'
+            val = int.from_bytes(element, 'big', signed=False)
+            assert val < EC_ORDER, 'Element int value >= EC_ORDER'
+            elements.append(val)
+    x_values, y_values = elements[0::2], elements[1::2]
+
+    xs = [HASH_SHIFT_POINT.x] * len(pairs)
+    ys = [HASH_SHIFT_POINT.y] * len(pairs)
+    try:
+        batch_add_multiples(xs, ys, [val & LOW_PART_MASK for val in x_values], P_0_AFFINE_TABLE)
+        batch_add_multiples(xs, ys, [val >> LOW_PART_BITS for val in x_values], P_1_AFFINE_TABLE)
+        batch_add_multiples(xs, ys, [val & LOW_PART_MASK for val in y_values], P_2_AFFINE_TABLE)
+        batch_add_multiples(xs, ys, [val >> LOW_PART_BITS for val in y_values], P_3_AFFINE_TABLE)
+    except ZeroDivisionError:
+        return [pedersen_hash_func(x, y) for x, y in pairs]
+    return [x.to_bytes(32, 'big') for x in xs]
 
 
 async def async_pedersen_hash_func(x: bytes, y: bytes) -> bytes:
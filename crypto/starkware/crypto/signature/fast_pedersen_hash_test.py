@@ -1,8 +1,11 @@
 import random
 
-from starkware.crypto.signature import EC_ORDER, pedersen_hash
+import pytest
 
-from .fast_pedersen_hash import HASH_SHIFT_POINT, pedersen_hash_func
+from starkware.crypto.signature import EC_ORDER, FIELD_PRIME, get_transfer_msg, pedersen_hash
+
+from .fast_pedersen_hash import (
+    HASH_SHIFT_POINT, MIN_BATCH_SIZE, fast_pedersen_hash, pedersen_hash_batch, pedersen_hash_func)
 
 
 def test_zero_element():
@@ -17,3 +20,39 @@ def test_random_hash():
     expected_res = pedersen_hash(x, y).to_bytes(32, 'big')
 
     assert expected_res == pedersen_hash_func(x.to_bytes(32, 'big'), y.to_bytes(32, 'big'))
+
+
+def test_fast_pedersen_hash():
+    x = random.randint(0, EC_ORDER - 1)
+    y = random.randint(0, EC_ORDER - 1)
+    assert fast_pedersen_hash(x, y) == pedersen_hash(x, y)
+
+    # Elements in [EC_ORDER, FIELD_PRIME) are handled by the reference implementation.
+    x = random.randint(EC_ORDER, FIELD_PRIME - 1)
+    assert fast_pedersen_hash(x, y) == pedersen_hash(x, y)
+
+
+def test_fast_pedersen_hash_messages():
+    """
+    Tests that the StarkEx message helpers can be given fast_pedersen_hash as their hash.
+    """
+    data = dict(
+        amount=random.randint(0, 2**63 - 1), nonce=random.randint(0, 2**31 - 1),
+        sender_vault_id=random.randint(0, 2**31 - 1), token=random.randint(0, FIELD_PRIME - 1),
+        receiver_vault_id=random.randint(0, 2**31 - 1),
+        receiver_public_key=random.randint(0, FIELD_PRIME - 1),
+        expiration_timestamp=random.randint(0, 2**22 - 1))
+    assert get_transfer_msg(hash=fast_pedersen_hash, **data) == get_transfer_msg(**data)
+    condition = random.randint(0, FIELD_PRIME - 1)
+    assert get_transfer_msg(hash=fast_pedersen_hash, condition=condition, **data) == \
+        get_transfer_msg(condition=condition, **data)
+
+
+@pytest.mark.parametrize('n_pairs', [1, MIN_BATCH_SIZE, 100])
+def test_pedersen_hash_batch(n_pairs):
+    zero = int(0).to_bytes(32, 'big')
+    pairs = [(zero, zero)] + [
+        (random.randint(0, EC_ORDER - 1).to_bytes(32, 'big'),
+         random.randint(0, EC_ORDER - 1).to_bytes(32, 'big'))
+        for _ in range(n_pairs - 1)]
+    assert pedersen_hash_batch(pairs) == [pedersen_hash_func(x, y) for x, y in pairs]
@@ -15,6 +15,7 @@
 ###############################################################################
 
 
+import sys
 from typing import Tuple
 
 import mpmath
@@ -24,6 +25,9 @@ from sympy.core.numbers import igcdex
 # A type that represents a point (x,y) on an elliptic curve.
 ECPoint = Tuple[int, int]
 
+# Starting from Python 3.8, pow(m, -1, p) computes modular inverses (in C).
+POW_SUPPORTS_MOD_INVERSE = sys.version_info >= (3, 8)
+
 
 def pi_as_string(digits: int) -> str:
     """
@@ -51,6 +55,12 @@ def div_mod(n: int, m: int, p: int) -> int:
     """
     Finds a nonnegative integer 0 <= x < p such that (m * x) % p == n
     """
+    if POW_SUPPORTS_MOD_INVERSE:
+        try:
+            inverse = pow(m, -1, p)
+        except ValueError:
+            raise AssertionError(f'{m} is not invertible modulo {p}.')
+        return (n * inverse) % p
     a, b, c = igcdex(m, p)
     assert c == 1
     return (n * a) % p
@@ -18,12 +18,12 @@ import hashlib
 import json
 import math
 import os
-import random
-from typing import Optional, Tuple, Union
+import secrets
+from typing import List, Optional, Tuple, Union
 
 from ecdsa.rfc6979 import generate_k
 
-from .math_utils import ECPoint, div_mod, ec_add, ec_double, ec_mult, is_quad_residue, sqrt_mod
+from .math_utils import ECPoint, div_mod, ec_add, ec_double, is_quad_residue, sqrt_mod
 
 PEDERSEN_HASH_POINT_FILENAME = os.path.join(
     os.path.dirname(__file__), 'pedersen_params.json')
@@ -68,6 +68,61 @@ class InvalidPublicKeyError(Exception):
         super().__init__('Given x coordinate does not represent any point on the elliptic curve.')
 
 
+# Multiplications of EC_GEN are done using a precomputed table of its multiples, processing
+# EC_GEN_WINDOW_BITS bits of the scalar at a time.
+EC_GEN_WINDOW_BITS = 4
+
+# EC_GEN_TABLE[i][j] is j * 2**(EC_GEN_WINDOW_BITS * i) * EC_GEN (EC_GEN_TABLE[i][0] is not used).
+FixedBaseTable = List[List[Optional[ECPoint]]]
+
+
+def precompute_fixed_base_table(point: ECPoint, n_bits: int) -> FixedBaseTable:
+    """
+    Returns the table of multiples of point, required by fixed_base_mult for n_bits-bit scalars.
+    """
+    table = []
+    for _ in range(0, n_bits, EC_GEN_WINDOW_BITS):
+        window: List[Optional[ECPoint]] = [None, point, ec_double(point, ALPHA, FIELD_PRIME)]
+        for _ in range(2 ** EC_GEN_WINDOW_BITS - 3):
+            window.append(ec_add(window[-1], point, FIELD_PRIME))
+        table.append(window)
+        point = ec_double(window[2 ** (EC_GEN_WINDOW_BITS - 1)], ALPHA, FIELD_PRIME)
+    return table
+
+
+EC_GEN_TABLE = precompute_fixed_base_table(EC_GEN, N_ELEMENT_BITS_HASH)
+
+
+def fixed_base_mult(m: int, table: FixedBaseTable, shift_point: ECPoint) -> ECPoint:
+    """
+    Computes m * point + shift_point, where table is the precomputed table of point.
+    Unlike mimic_ec_mult_air, it does not follow the steps of the AIR. It may only be used where
+    the AIR cannot error, except with negligible probability.
+    """
+    assert m > 0
+    partial_sum = shift_point
+    for window in table:
+        if m == 0:
+            # The remaining windows are all zero.
+            break
+        digit = m & (2 ** EC_GEN_WINDOW_BITS - 1)
+        if digit != 0:
+            partial_sum = ec_add(partial_sum, window[digit], FIELD_PRIME)  # type: ignore
+        m >>= EC_GEN_WINDOW_BITS
+    assert m == 0
+    return partial_sum
+
+
+def ec_gen_mult(m: int) -> ECPoint:
+    """
+    Computes m * EC_GEN for 0 < m < EC_ORDER, using EC_GEN_TABLE.
+    The computation is shifted by SHIFT_POINT, so that it never adds a point to itself. It fails
+    only if m * EC_GEN is +-SHIFT_POINT, which happens with negligible probability.
+    """
+    assert 0 < m < EC_ORDER
+    return ec_add(fixed_base_mult(m, EC_GEN_TABLE, SHIFT_POINT), MINUS_SHIFT_POINT, FIELD_PRIME)
+
+
 def get_y_coordinate(stark_key_x_coordinate: int) -> int:
     """
     Given the x coordinate of a stark_key, returns a possible y coordinate such that together the
@@ -85,12 +140,11 @@ def get_y_coordinate(stark_key_x_coordinate: int) -> int:
 
 def get_random_private_key() -> int:
     # NOTE: It is IMPORTANT to use a strong random function here.
-    return random.randint(1, EC_ORDER - 1)
+    return secrets.randbelow(EC_ORDER - 1) + 1
 
 
 def private_key_to_ec_point_on_stark_curve(priv_key: int) -> ECPoint:
-    assert 0 < priv_key < EC_ORDER
-    return ec_mult(priv_key, EC_GEN, ALPHA, FIELD_PRIME)
+    return ec_gen_mult(priv_key)
 
 
 def private_to_stark_key(priv_key: int) -> int:
@@ -134,8 +188,8 @@ def sign(msg_hash: int, priv_key: int, seed: Optional[int] = None) -> ECSignatur
         else:
             seed += 1
 
-        # Cannot fail because 0 < k < EC_ORDER and EC_ORDER is prime.
-        x = ec_mult(k, EC_GEN, ALPHA, FIELD_PRIME)[0]
+        # Fails only with negligible probability (see ec_gen_mult).
+        x = ec_gen_mult(k)[0]
 
         # DIFF: in classic ECDSA, we take int(x) % n.
         r = int(x)
@@ -194,13 +248,13 @@ def verify(msg_hash: int, r: int, s: int, public_key: Union[int, ECPoint]) -> bo
             return False
         assert pow(y, 2, FIELD_PRIME) == (
             pow(public_key, 3, FIELD_PRIME) + ALPHA * public_key + BETA) % FIELD_PRIME
-        return verify(msg_hash, r, s, (public_key, y)) or \
-            verify(msg_hash, r, s, (public_key, (-y) % FIELD_PRIME))
+        public_key_points = [(public_key, y), (public_key, (-y) % FIELD_PRIME)]
     else:
         # The public key is provided as a point.
         # Verify it is on the curve.
         assert (public_key[1]**2 - (public_key[0]**3 + ALPHA *
                                     public_key[0] + BETA)) % FIELD_PRIME == 0
+        public_key_points = [public_key]
 
     # Signature validation.
     # DIFF: original formula is:
@@ -211,21 +265,61 @@ def verify(msg_hash: int, r: int, s: int, public_key: Union[int, ECPoint]) -> bo
     # given the current implementation.
     # This formula ensures that if the verification errors in our AIR, it errors here as well.
     try:
-        zG = mimic_ec_mult_air(msg_hash, EC_GEN, MINUS_SHIFT_POINT)
-        rQ = mimic_ec_mult_air(r, public_key, SHIFT_POINT)
-        wB = mimic_ec_mult_air(w, ec_add(zG, rQ, FIELD_PRIME), SHIFT_POINT)
-        x = ec_add(wB, MINUS_SHIFT_POINT, FIELD_PRIME)[0]
+        # For the fixed EC_GEN base, the AIR errors only with negligible probability (it requires
+        # a known relation between SHIFT_POINT and EC_GEN), so a faster computation is used.
+        # zG does not depend on the public key, so it is shared by the two possible y coordinates.
+        zG = fixed_base_mult(msg_hash, EC_GEN_TABLE, MINUS_SHIFT_POINT)
     except AssertionError:
         return False
 
-    # DIFF: Here we drop the mod n from classic ECDSA.
-    return r == x
+    for public_key_point in public_key_points:
+        try:
+            rQ = mimic_ec_mult_air(r, public_key_point, SHIFT_POINT)
+            wB = mimic_ec_mult_air(w, ec_add(zG, rQ, FIELD_PRIME), SHIFT_POINT)
+            x = ec_add(wB, MINUS_SHIFT_POINT, FIELD_PRIME)[0]
+        except AssertionError:
+            continue
+
+        # DIFF: Here we drop the mod n from classic ECDSA.
+        if r == x:
+            return True
+    return False
 
 
 #################
 # Pedersen hash #
 #################
 
+# The constant points of each element are added a window of PEDERSEN_WINDOW_BITS bits at a time,
+# using precomputed tables of the sums of the points of each window.
+PEDERSEN_WINDOW_BITS = 4
+PEDERSEN_WINDOW_MASK = 2**PEDERSEN_WINDOW_BITS - 1
+assert N_ELEMENT_BITS_HASH % PEDERSEN_WINDOW_BITS == 0
+
+# A table of the sums of the constant points of a window. table[c] is the sum of the points that
+# correspond to the bits that are set in c (table[0] is not used).
+PedersenWindowTable = List[Optional[ECPoint]]
+
+
+def precompute_pedersen_window_table(points: List[ECPoint]) -> PedersenWindowTable:
+    """
+    Returns the table of the sums of all the subsets of points.
+    """
+    table: PedersenWindowTable = [None]
+    for point in points:
+        table += [point if partial_sum is None else ec_add(partial_sum, point, FIELD_PRIME)
+                  for partial_sum in table]
+    return table
+
+
+# PEDERSEN_TABLES[i] is the list of window tables of the i-th hashed element.
+PEDERSEN_TABLES = [
+    [precompute_pedersen_window_table(CONSTANT_POINTS[j:j + PEDERSEN_WINDOW_BITS])
+     for j in range(2 + i * N_ELEMENT_BITS_HASH, 2 + (i + 1) * N_ELEMENT_BITS_HASH,
+                    PEDERSEN_WINDOW_BITS)]
+    for i in range((len(CONSTANT_POINTS) - 2) // N_ELEMENT_BITS_HASH)]
+
+
 def pedersen_hash(*elements: int) -> int:
     return pedersen_hash_as_point(*elements)[0]
 
@@ -235,15 +329,19 @@ def pedersen_hash_as_point(*elements: int) -> ECPoint:
     Similar to pedersen_hash but also returns the y coordinate of the resulting EC point.
     This function is used for testing.
     """
+    assert len(elements) <= len(PEDERSEN_TABLES)
     point = SHIFT_POINT
-    for i, x in enumerate(elements):
+    for x, window_tables in zip(elements, PEDERSEN_TABLES):
         assert 0 <= x < FIELD_PRIME
-        point_list = CONSTANT_POINTS[2 + i * N_ELEMENT_BITS_HASH:2 + (i + 1) * N_ELEMENT_BITS_HASH]
-        assert len(point_list) == N_ELEMENT_BITS_HASH
-        for pt in point_list:
-            assert point[0] != pt[0], 'Unhashable input.'
-            if x & 1:
+        for table in window_tables:
+            if x == 0:
+                # The remaining windows are all zero.
+                break
+            window = x & PEDERSEN_WINDOW_MASK
+            if window != 0:
+                pt = table[window]
+                assert point[0] != pt[0], 'Unhashable input.'
                 point = ec_add(point, pt, FIELD_PRIME)
-            x >>= 1
+            x >>= PEDERSEN_WINDOW_BITS
         assert x == 0
     return point
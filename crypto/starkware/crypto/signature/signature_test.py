@@ -22,10 +22,13 @@ from typing import Dict
 
 import pytest
 
+from .math_utils import ec_add, ec_mult
 from .signature import (
-    EC_ORDER, FIELD_PRIME, N_ELEMENT_BITS_ECDSA, InvalidPublicKeyError, get_random_private_key,
-    get_y_coordinate, pedersen_hash, private_key_to_ec_point_on_stark_curve, private_to_stark_key,
-    sign, verify)
+    ALPHA, CONSTANT_POINTS, EC_GEN, EC_GEN_TABLE, EC_ORDER, FIELD_PRIME, MINUS_SHIFT_POINT,
+    N_ELEMENT_BITS_ECDSA, N_ELEMENT_BITS_HASH, SHIFT_POINT, InvalidPublicKeyError, ec_gen_mult,
+    fixed_base_mult, get_random_private_key, get_y_coordinate, mimic_ec_mult_air, pedersen_hash,
+    pedersen_hash_as_point, private_key_to_ec_point_on_stark_curve, private_to_stark_key, sign,
+    verify)
 from .starkex_messages import get_limit_order_msg, get_transfer_msg
 
 logger = logging.getLogger(__name__)
@@ -97,6 +100,29 @@ def test_pedersen_hash(data_file, pedersen_hash_data):
         int(data_file['hash_test'][pedersen_hash_data]['output'], 16)
 
 
+def test_pedersen_hash_windows():
+    """
+    Tests the windowed pedersen_hash_as_point against adding the constant point of each bit.
+    """
+    elements = [random.randrange(FIELD_PRIME), random.randrange(FIELD_PRIME)]
+    point = SHIFT_POINT
+    for i, x in enumerate(elements):
+        for bit in range(N_ELEMENT_BITS_HASH):
+            if x >> bit & 1:
+                point = ec_add(point, CONSTANT_POINTS[2 + i * N_ELEMENT_BITS_HASH + bit],
+                               FIELD_PRIME)
+    assert pedersen_hash_as_point(*elements) == point
+
+
+def test_fixed_base_mult():
+    m = random.randrange(1, 2**N_ELEMENT_BITS_ECDSA)
+    assert fixed_base_mult(m, EC_GEN_TABLE, MINUS_SHIFT_POINT) == \
+        mimic_ec_mult_air(m, EC_GEN, MINUS_SHIFT_POINT)
+
+    m = random.randrange(1, EC_ORDER)
+    assert ec_gen_mult(m) == ec_mult(m, EC_GEN, ALPHA, FIELD_PRIME)
+
+
 def test_order_message(data_file: dict):
     """
     Tests order message. Parameters are from signature_test_data.json.
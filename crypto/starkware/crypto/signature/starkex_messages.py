@@ -1,8 +1,18 @@
-from typing import Optional
+from functools import lru_cache
+from typing import Callable, Optional
 
 from .signature import FIELD_PRIME, pedersen_hash
 
 
+@lru_cache(maxsize=1024)
+def hash_token_pair(hash: Callable[[int, int], int], token0: int, token1_or_pub_key: int) -> int:
+    """
+    Computes the first hash of get_msg. Orders and transfers of the same token pair share it, so
+    the recently used pairs are cached.
+    """
+    return hash(token0, token1_or_pub_key)
+
+
 def get_msg(
         instruction_type: int, vault0: int, vault1: int, amount0: int, amount1: int, token0: int,
         token1_or_pub_key: int, nonce: int, expiration_timestamp: int,
@@ -20,9 +30,10 @@ def get_msg(
     if condition is not None:
         # A message representing a conditional transfer. The condition is interpreted by the
         # application.
-        return hash(hash(hash(token0, token1_or_pub_key), condition), packed_message)
+        return hash(
+            hash(hash_token_pair(hash, token0, token1_or_pub_key), condition), packed_message)
 
-    return hash(hash(token0, token1_or_pub_key), packed_message)
+    return hash(hash_token_pair(hash, token0, token1_or_pub_key), packed_message)
 
 
 def get_limit_order_msg(
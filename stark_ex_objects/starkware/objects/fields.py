@@ -1,6 +1,18 @@
 import re
 
-from marshmallow import fields
+from marshmallow import ValidationError, fields
+
+HEX_REGEX = re.compile('^0x[0-9a-f]+$')
+HEX_WITHOUT_PREFIX_REGEX = re.compile('^[0-9a-f]+$')
+
+
+def int_from_hex(value: str) -> int:
+    """
+    Converts a hex string to an int, accepting only the strings that IntAsHex accepts.
+    """
+    if HEX_REGEX.match(value) is None:
+        raise ValidationError(f'Expected hex string, got: "{value}".')
+    return int(value, 16)
 
 
 class IntAsStr(fields.Field):
@@ -50,7 +62,7 @@ class IntAsHex(fields.Field):
         return hex(value)
 
     def _deserialize(self, value, attr, data, **kwargs):
-        if re.match('^0x[0-9a-f]+$', value) is None:
+        if HEX_REGEX.match(value) is None:
             self.fail('invalid', input=value)
 
         return int(value, 16)
@@ -70,7 +82,7 @@ class BytesAsHex(fields.Field):
         return value.hex()
 
     def _deserialize(self, value, attr, data, **kwargs):
-        if re.match('^[0-9a-f]+$', value) is None:
+        if HEX_WITHOUT_PREFIX_REGEX.match(value) is None:
             self.fail('invalid', input=value)
 
         return bytes.fromhex(value)
@@ -1,3 +1,4 @@
+import json
 from collections import defaultdict
 from dataclasses import dataclass, field
 from typing import Awaitable, Callable, ClassVar, Dict, Type
@@ -9,7 +10,7 @@ from starkware.error_handling import (
     StarkMsg, stark_assert, stark_assert_eq, stark_assert_le, stark_assert_ne)
 from starkware.storage import HASH_BYTES, Fact
 
-from .fields import IntAsHex, IntAsStr
+from .fields import IntAsHex, IntAsStr, int_from_hex
 
 MAX_AMOUNT = 2 ** 63
 
@@ -71,7 +72,10 @@ class VaultStateFact(VaultState, Fact):
         return b'vault_state'
 
     def serialize(self) -> bytes:
-        return VaultStateFact.Schema().dumps(self).encode('ascii')  # type: ignore
+        # Same as VaultStateFact.Schema().dumps(self), but much faster.
+        return (
+            f'{{"stark_key": "{hex(self.stark_key)}", "token": "{hex(self.token)}", '
+            f'"balance": "{self.balance}"}}').encode('ascii')
 
     async def _hash(self, hash_func: Callable[[bytes, bytes], Awaitable[bytes]]) -> bytes:
         hash0 = await hash_func(self.stark_key.to_bytes(HASH_BYTES, 'big'),
@@ -80,7 +84,13 @@ class VaultStateFact(VaultState, Fact):
 
     @classmethod
     def deserialize(cls, data: bytes) -> 'VaultStateFact':
-        return cls.Schema().loads(data)  # type: ignore
+        # Same as VaultStateFact.Schema().loads(data), for data written by serialize() or by the
+        # schema. The hex fields are validated as in the schema.
+        values = json.loads(data)
+        return cls(
+            stark_key=int_from_hex(values['stark_key']),
+            token=int_from_hex(values['token']),
+            balance=int(values['balance']))
 
 
 @dataclass
@@ -125,14 +135,31 @@ class OrderStateFact(OrderState, Fact):
         return b'order_state'
 
     def serialize(self) -> bytes:
-        return OrderStateFact.Schema().dumps(self).encode('ascii')  # type: ignore
+        # Same as OrderStateFact.Schema().dumps(self), but much faster.
+        return f'{{"fulfilled_amount": "{self.fulfilled_amount}"}}'.encode('ascii')
 
     async def _hash(self, hash_func: Callable[[bytes, bytes], Awaitable[bytes]]) -> bytes:
         return self.fulfilled_amount.to_bytes(HASH_BYTES, 'big')
 
     @classmethod
     def deserialize(cls, data: bytes) -> 'OrderStateFact':
-        return cls.Schema().loads(data)  # type: ignore
+        # Same as OrderStateFact.Schema().loads(data), for data written by serialize() or by the
+        # schema.
+        return cls(fulfilled_amount=int(json.loads(data)['fulfilled_amount']))
+
+
+def is_sub_dict(sub: dict, full: dict) -> bool:
+    """
+    Returns true if and only if every item of sub is also in full.
+    A key that is missing in a defaultdict is treated as having the default value, without
+    inserting it.
+    """
+    default_factory = getattr(full, 'default_factory', None)
+    default = None if default_factory is None else default_factory()
+    for key, value in sub.items():
+        if full.get(key, default) != value:
+            return False
+    return True
 
 
 @dataclass
@@ -176,18 +203,15 @@ class PartialState:
     def __le__(self, other) -> bool:
         """
         Returns true if and only if this state is partial to other.
+        Missing leaves of a full state are compared as empty leaves, and are not added to it.
         """
         assert isinstance(other, PartialState)
-        try:
-            for k in self.vaults.keys():
-                if self.vaults[k] != other.vaults[k]:
-                    return False
-            for k in self.orders.keys():
-                if self.orders[k] != other.orders[k]:
-                    return False
-        except KeyError:
-            return False
-        return True
+        return is_sub_dict(self.vaults, other.vaults) and is_sub_dict(self.orders, other.orders)
 
     def __eq__(self, other):
-        return self <= other and other <= self
+        assert isinstance(other, PartialState)
+        leaves = (self.vaults, self.orders, other.vaults, other.orders)
+        if any(isinstance(leaf_dict, defaultdict) for leaf_dict in leaves):
+            # Missing leaves of a full state are empty, so the dicts cannot be compared directly.
+            return self <= other and other <= self
+        return self.vaults == other.vaults and self.orders == other.orders
@@ -0,0 +1,107 @@
+import marshmallow
+import pytest
+
+from .state import OrderStateFact, PartialState, VaultStateFact
+
+
+@pytest.mark.parametrize('fact', [
+    VaultStateFact(stark_key=0, token=0, balance=0),
+    VaultStateFact(stark_key=2**251 + 17, token=0xabc, balance=2**63 - 1),
+    OrderStateFact(fulfilled_amount=0),
+    OrderStateFact(fulfilled_amount=2**63 - 1),
+])
+def test_fact_serialization(fact):
+    """
+    Tests that serialize() and deserialize() are compatible with the marshmallow schema of the fact.
+    """
+    schema = type(fact).Schema()
+    assert schema.loads(fact.serialize()) == fact
+    assert type(fact).deserialize(schema.dumps(fact).encode('ascii')) == fact
+    assert type(fact).deserialize(fact.serialize()) == fact
+
+
+@pytest.mark.parametrize('stark_key', ['1', '0X1', '0xA', '0x1_0', ' 0x1', '0x'])
+def test_vault_state_fact_invalid_hex(stark_key):
+    """
+    Tests that VaultStateFact.deserialize() rejects the hex strings that the schema rejects.
+    """
+    data = f'{{"stark_key": "{stark_key}", "token": "0x1", "balance": "1"}}'.encode('ascii')
+    with pytest.raises(marshmallow.ValidationError):
+        VaultStateFact.Schema().loads(data)
+    with pytest.raises(marshmallow.ValidationError):
+        VaultStateFact.deserialize(data)
+
+
+def test_partial_state_le():
+    """
+    Tests PartialState.__le__ between full states (where missing leaves are empty) and partial
+    states.
+    """
+    vault = VaultStateFact(stark_key=1, token=2, balance=3)
+    other_vault = VaultStateFact(stark_key=1, token=2, balance=4)
+    order = OrderStateFact(fulfilled_amount=5)
+
+    full = PartialState.empty()
+    partial = PartialState(vaults={1: vault}, orders={2: order})
+    empty_leaves = PartialState(vaults={1: VaultStateFact.empty()}, orders={2: OrderStateFact.empty()})
+
+    # Partial state vs. full state.
+    assert not partial <= full
+    assert empty_leaves <= full
+    assert PartialState(vaults={}, orders={}) <= full
+    # The full state has no explicit leaves, so it is partial to any state. The comparisons above
+    # must not add leaves to it.
+    assert full <= partial
+    assert len(full.vaults) == 0 and len(full.orders) == 0
+
+    # Mixed: a full state with explicit leaves.
+    full.vaults[1] = vault
+    full.orders[2] = order
+    assert partial <= full
+    assert not full <= empty_leaves
+
+    # Partial state vs. partial state.
+    assert PartialState(vaults={1: vault}, orders={}) <= partial
+    assert not partial <= PartialState(vaults={1: vault}, orders={})
+    assert not PartialState(vaults={1: other_vault}, orders={}) <= partial
+    # A missing leaf of a partial state is unknown, not empty.
+    assert not empty_leaves <= PartialState(vaults={}, orders={})
+
+
+def test_partial_state_eq():
+    """
+    Tests PartialState.__eq__, both for plain dicts (compared directly) and for full states.
+    """
+    vault = VaultStateFact(stark_key=1, token=2, balance=3)
+    order = OrderStateFact(fulfilled_amount=5)
+
+    # Partial states.
+    assert PartialState(vaults={1: vault}, orders={2: order}) == \
+        PartialState(vaults={1: vault}, orders={2: order})
+    assert PartialState(vaults={1: vault}, orders={}) != \
+        PartialState(vaults={1: vault}, orders={2: order})
+    assert PartialState(vaults={1: vault}, orders={}) != \
+        PartialState(vaults={1: VaultStateFact.empty()}, orders={})
+    # A missing leaf of a partial state is not equal to an empty leaf.
+    assert PartialState(vaults={}, orders={}) != \
+        PartialState(vaults={1: VaultStateFact.empty()}, orders={})
+
+    # Full states: leaves with the default value are equal to missing leaves.
+    full = PartialState.empty()
+    assert full == PartialState.empty()
+    full_with_empty_leaves = PartialState.empty()
+    full_with_empty_leaves.vaults[1] = VaultStateFact.empty()
+    full_with_empty_leaves.orders[2] = OrderStateFact.empty()
+    assert full == full_with_empty_leaves
+    assert full_with_empty_leaves == full
+    full_with_leaves = PartialState.empty()
+    full_with_leaves.vaults[1] = vault
+    assert full != full_with_leaves
+
+    # Mixed.
+    assert PartialState(vaults={1: VaultStateFact.empty()}, orders={}) == full
+    assert PartialState(vaults={1: vault}, orders={}) != full
+    assert PartialState(vaults={1: vault}, orders={}) == full_with_leaves
+    # None of the comparisons adds leaves to the full states.
+    assert len(full.vaults) == 0 and len(full.orders) == 0
+    assert len(full_with_leaves.vaults) == 1 and len(full_with_leaves.orders) == 0
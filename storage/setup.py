@@ -20,7 +20,6 @@ setup(
         'aiobotocore==0.11.0',
         'aioredis==1.2.0',
         'aioredlock==0.3.0',
-        'cachetools==3.1.1',
     ],
     long_description=long_description,
 )
@@ -34,12 +34,14 @@ class AerospikeLockManager(LockManager):
                  use_services_alternate: bool = False,
                  ttl: int = 30,
                  n_retries: int = 30,
-                 max_wait_time: float = 1.):
+                 max_wait_time: float = 1.,
+                 min_wait_time: float = 0.01):
         self.aero_set = aero_set
         self.namespace = namespace
         self.ttl = ttl
         self.n_retries = n_retries
         self.max_wait_time = max_wait_time
+        self.min_wait_time = min_wait_time
         while True:
             try:
                 self.client = aerospike.client({
@@ -66,11 +68,13 @@ class AerospikeLockManager(LockManager):
             raise LockError(e)
 
     async def lock(self, name: str) -> AerospikeLockObject:
-        for _ in range(self.n_retries):
+        for attempt in range(self.n_retries):
             try:
                 return await self.try_lock(name)
             except LockError:
-                await asyncio.sleep(random.random() * self.max_wait_time)
+                # Exponential backoff with full jitter, so that contending clients spread out.
+                wait_time = min(self.max_wait_time, self.min_wait_time * 2 ** attempt)
+                await asyncio.sleep(random.random() * wait_time)
         raise LockError()
 
     async def _extend(self, name: str):
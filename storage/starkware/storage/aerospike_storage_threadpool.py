@@ -6,7 +6,7 @@ import logging
 import time
 from abc import abstractmethod
 from concurrent.futures import ThreadPoolExecutor
-from typing import List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 import aerospike
 
@@ -15,6 +15,9 @@ from .storage import Storage
 logger = logging.getLogger(__name__)
 
 SHORT_MODE_EXCLUDE = ('batch_dispatched:', 'package:', 'merkle_node:', 'block:')
+# Default maximal number of keys in a single batch read. Aerospike servers reject batches with more
+# keys than their batch-max-requests setting (5000 by default).
+MAX_BATCH_SIZE = 5000
 
 
 def create_client(hosts, use_services_alternate):
@@ -33,6 +36,10 @@ def create_client(hosts, use_services_alternate):
             time.sleep(1)
 
 
+def run_sequentially(func: Callable, args_list: List[tuple]) -> list:
+    return [func(*args) for args in args_list]
+
+
 class AerospikeThreadedStorageBase(Storage):
     def __init__(self, hosts: List[Tuple[str, int]], namespace: str,
                  aero_set: str,
@@ -49,6 +56,7 @@ class AerospikeThreadedStorageBase(Storage):
         self.aero_set = aero_set
         self.namespace = namespace
         self.client = create_client(hosts, use_services_alternate)
+        self.max_workers = max_workers
         self.pool = ThreadPoolExecutor(max_workers)
         if override_write_policy is None:
             override_write_policy = {}
@@ -82,6 +90,29 @@ class AerospikeThreadedStorageBase(Storage):
         await asyncio.get_event_loop().run_in_executor(
             self.pool, self.sync_del, key)
 
+    async def mset(self, updates: Dict[bytes, bytes]):
+        await self.run_in_chunks(
+            self.sync_set, [(key, value, self.set_write_policy) for key, value in updates.items()])
+
+    async def mget(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        return tuple(await self.run_in_chunks(self.sync_get, [(key,) for key in keys]))
+
+    async def run_in_chunks(self, func: Callable, args_list: List[tuple]) -> list:
+        """
+        Calls func(*args) for each args in args_list, and returns the results.
+        The calls are split into (at most) max_workers chunks, and each chunk is a single pool task,
+        instead of submitting a task per call.
+        """
+        if len(args_list) == 0:
+            return []
+        chunk_size = -(-len(args_list) // self.max_workers)
+        loop = asyncio.get_event_loop()
+        chunk_results = await asyncio.gather(*(
+            loop.run_in_executor(
+                self.pool, run_sequentially, func, args_list[i:i + chunk_size])
+            for i in range(0, len(args_list), chunk_size)))
+        return [result for results in chunk_results for result in results]
+
     @abstractmethod
     def sync_set(self, key: bytes, value: bytes, write_policy: dict) -> bool:
         pass
@@ -99,8 +130,12 @@ class AerospikeStorage(AerospikeThreadedStorageBase):
     def __init__(self, hosts: List[Tuple[str, int]], namespace: str,
                  aero_set: str,
                  use_services_alternate: Optional[bool] = None,
-                 max_workers: Optional[int] = None):
+                 max_workers: Optional[int] = None,
+                 max_batch_size: Optional[int] = None):
         super().__init__(hosts, namespace, aero_set, use_services_alternate, max_workers)
+        if max_batch_size is None:
+            max_batch_size = MAX_BATCH_SIZE
+        self.max_batch_size = max_batch_size
         self.num_sets = 0
         self.num_gets = 0
         self.num_deletes = 0
@@ -124,6 +159,25 @@ class AerospikeStorage(AerospikeThreadedStorageBase):
             return None
         return bytes(record['value'])
 
+    def sync_mget(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        records = self.client.get_many(
+            [(self.namespace, self.aero_set, bytearray(key)) for key in keys])
+        # The bins of a record that does not exist are None.
+        values = tuple(None if bins is None else bytes(bins['value']) for _, _, bins in records)
+        self.num_gets += sum(value is not None for value in values)
+        return values
+
+    async def mget(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        """
+        Reads the keys using batch requests of at most max_batch_size keys, instead of a request
+        per key. The batches are sent concurrently.
+        """
+        loop = asyncio.get_event_loop()
+        chunk_values = await asyncio.gather(*(
+            loop.run_in_executor(self.pool, self.sync_mget, keys[i:i + self.max_batch_size])
+            for i in range(0, len(keys), self.max_batch_size)))
+        return tuple(value for values in chunk_values for value in values)
+
     def sync_del(self, key: bytes) -> bool:
         try:
             self.client.remove((self.namespace, self.aero_set, bytearray(key)))
@@ -154,13 +208,16 @@ class AerospikeStorage(AerospikeThreadedStorageBase):
         if number_of_records[0] > 3000:
             return json.dumps('database too big (> 3000 records)')
         keys_list.sort()
-        for item in keys_list:
-            item_value = await self.get_value(item)
-            item_name = codecs.escape_encode(item)[0].decode('ascii')  # type: ignore
-            if mode == 'short':
-                # Mode 'short' - exclude blockchain packages, blocks, and merkle nodes.
-                if item_name.startswith(SHORT_MODE_EXCLUDE):
-                    continue
+        items = [
+            (item, codecs.escape_encode(item)[0].decode('ascii'))  # type: ignore
+            for item in keys_list]
+        if mode == 'short':
+            # Mode 'short' - exclude blockchain packages, blocks, and merkle nodes.
+            items = [
+                (item, item_name) for item, item_name in items
+                if not item_name.startswith(SHORT_MODE_EXCLUDE)]
+        item_values = await self.mget([item for item, _ in items])
+        for (_, item_name), item_value in zip(items, item_values):
             item_value_str = None if item_value is None else \
                 codecs.escape_encode(item_value)[0].decode('ascii')  # type: ignore
             data[item_name] = item_value_str
@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# The version check also skips the aerospike server configuration directory of this repository,
+# which is importable as a namespace package when running from its root.
+pytest.importorskip('aerospike', minversion='4.0.0')
+
+from .aerospike_storage_threadpool import AerospikeStorage  # noqa: E402
+
+
+class GetManyClientMock:
+    """
+    An Aerospike client mock that serves get_many() from a dict, and records the batch sizes.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.batch_sizes = []
+
+    def get_many(self, keys):
+        self.batch_sizes.append(len(keys))
+        return [
+            (key, None, None if bytes(key[2]) not in self.db else {'value': self.db[bytes(key[2])]})
+            for key in keys]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('n_keys', [0, 1, 7, 12])
+async def test_mget_chunks(n_keys):
+    """
+    Tests that AerospikeStorage.mget() reads the keys in batches of at most max_batch_size keys,
+    and returns the values in order.
+    """
+    # The storage is created without connecting to a server.
+    storage = AerospikeStorage.__new__(AerospikeStorage)
+    storage.namespace = 'namespace'
+    storage.aero_set = 'set'
+    storage.pool = ThreadPoolExecutor(4)
+    storage.num_gets = 0
+    storage.max_batch_size = 5
+    db = {b'key%d' % i: b'value%d' % i for i in range(0, n_keys, 2)}
+    storage.client = GetManyClientMock(db)
+
+    keys = [b'key%d' % i for i in range(n_keys)]
+    assert await storage.mget(keys) == tuple(db.get(key) for key in keys)
+    assert sum(storage.client.batch_sizes) == n_keys
+    assert all(batch_size <= 5 for batch_size in storage.client.batch_sizes)
+    assert len(storage.client.batch_sizes) == -(-n_keys // 5)
+    assert storage.num_gets == len(db)
@@ -1,7 +1,7 @@
-from typing import Optional
-
-from cachetools import LRUCache
+import asyncio
+from typing import Dict, Optional
 
+from .lru_cache import LRUCache
 from .storage import Storage
 
 
@@ -32,19 +32,33 @@ class CachedStorage(Storage):
     def __init__(self, storage: Storage, max_size):
         self.storage = storage
         self.cache = LRUCache(max_size)
+        # Reads of keys that are not in the cache, which are still in progress.
+        self.pending_reads: Dict[bytes, asyncio.Future] = {}
 
     async def set_value(self, key: bytes, value: bytes):
         self.cache[key] = value
         await self.storage.set_value(key, value)
 
     async def get_value(self, key: bytes) -> Optional[bytes]:
-        if key in self.cache:
-            return self.cache[key]
-        value = await self.storage.get_value(key)
-        if value is None:
-            return None
-        self.cache[key] = value
-        return value
+        value = self.cache.get(key)
+        if value is not None:
+            return value
+        # Concurrent reads of the same key share a single read from the underlying storage.
+        pending_read = self.pending_reads.get(key)
+        if pending_read is None:
+            pending_read = asyncio.ensure_future(self.read_and_cache(key))
+            self.pending_reads[key] = pending_read
+        # Shield the shared read, so that cancelling one reader does not cancel the others.
+        return await asyncio.shield(pending_read)
+
+    async def read_and_cache(self, key: bytes) -> Optional[bytes]:
+        try:
+            value = await self.storage.get_value(key)
+            if value is not None:
+                self.cache[key] = value
+            return value
+        finally:
+            del self.pending_reads[key]
 
     async def del_value(self, key: bytes):
         raise NotImplementedError('CachedStorage is expected to handle only immutable items')
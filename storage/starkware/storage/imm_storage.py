@@ -1,6 +1,6 @@
 import asyncio
 from contextlib import asynccontextmanager
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from .storage import Storage
 
@@ -23,6 +23,18 @@ class _ImmediateStorage(Storage):
             self.db[key] = res
         return res
 
+    async def mset(self, updates: Dict[bytes, bytes]):
+        self.db.update(updates)
+        self.write_tasks.append(asyncio.create_task(self.storage.mset(updates)))
+
+    async def mget(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        missing_keys = [key for key in keys if key not in self.db]
+        if len(missing_keys) > 0:
+            for key, res in zip(missing_keys, await self.storage.mget(missing_keys)):
+                if res is not None:
+                    self.db[key] = res
+        return tuple(self.db.get(key) for key in keys)
+
     async def del_value(self, key: bytes):
         if key in self.db:
             del self.db[key]
@@ -0,0 +1,38 @@
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+TKey = TypeVar('TKey', bound=Hashable)
+TValue = TypeVar('TValue')
+
+
+class LRUCache(Generic[TKey, TValue]):
+    """
+    A cache that holds up to max_size items, evicting the least recently used item when full.
+    The bookkeeping is done by OrderedDict, which is implemented in C, and is considerably cheaper
+    than cachetools.LRUCache.
+    """
+
+    def __init__(self, max_size: int):
+        assert max_size > 0
+        self.max_size = max_size
+        self.items: 'OrderedDict[TKey, TValue]' = OrderedDict()
+
+    def get(self, key: TKey, default: Optional[TValue] = None) -> Optional[TValue]:
+        try:
+            value = self.items[key]
+        except KeyError:
+            return default
+        self.items.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: TKey, value: TValue):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+
+    def __contains__(self, key: TKey) -> bool:
+        return key in self.items
+
+    def __len__(self) -> int:
+        return len(self.items)
@@ -0,0 +1,22 @@
+from starkware.storage.lru_cache import LRUCache
+
+
+def test_lru_cache():
+    cache: LRUCache[int, str] = LRUCache(max_size=2)
+    cache[0] = 'a'
+    cache[1] = 'b'
+    assert cache.get(0) == 'a'
+
+    # 1 is the least recently used item.
+    cache[2] = 'c'
+    assert len(cache) == 2
+    assert 1 not in cache
+    assert cache.get(1) is None
+    assert cache.get(1, 'default') == 'default'
+
+    # Setting an existing item makes it the most recently used.
+    cache[0] = 'd'
+    cache[3] = 'e'
+    assert cache.get(0) == 'd'
+    assert 2 not in cache
+    assert cache.get(3) == 'e'
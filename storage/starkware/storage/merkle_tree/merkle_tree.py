@@ -1,6 +1,6 @@
 import asyncio
 from dataclasses import dataclass
-from typing import Awaitable, Callable, Dict, List, Set, Tuple, Type, TypeVar
+from typing import AbstractSet, Awaitable, Callable, Dict, List, Tuple, Type, TypeVar
 
 from ..storage import HASH_BYTES, Fact, Storage
 
@@ -10,6 +10,9 @@ TLeafNodeFact = TypeVar('TLeafNodeFact', bound='Fact')
 
 @dataclass
 class MerkleNodeFact(Fact):
+    # An update creates height nodes per modified leaf, so the nodes do not carry a __dict__.
+    __slots__ = ('left_node', 'right_node')
+
     left_node: bytes
     right_node: bytes
 
@@ -50,11 +53,14 @@ class MerkleTree:
         """
         Initializes an empty MerkleTree where all the leaves' roots are equal to 'empty_leaf'.
         """
-        assert height >= 0
-        root = cls(await leaf_fact.set_fact(storage, hash_func), 0, storage, hash_func)
-        for _ in range(height):
-            root = await cls.combine(root, root)
-        return root
+        roots = await cls.empty_tree_roots(height, leaf_fact, hash_func)
+        await leaf_fact.set(storage, roots[0])
+        if height > 0:
+            # The nodes of all the layers are written at once.
+            await storage.mset({
+                MerkleNodeFact.db_key(root): MerkleNodeFact(child_root, child_root).serialize()
+                for child_root, root in zip(roots, roots[1:])})
+        return cls(roots[-1], height, storage, hash_func)
 
     @classmethod
     async def combine(cls, left: 'MerkleTree', right: 'MerkleTree') -> 'MerkleTree':
@@ -86,29 +92,30 @@ class MerkleTree:
             roots.append(await hash_func(roots[-1], roots[-1]))
         return roots
 
-    async def dfs(self, exclude_set: Set[bytes]):
+    async def dfs(self, exclude_set: AbstractSet[bytes]):
         """
         Iterates the tree in DFS order while skipping subtrees with roots in the exclude_set.
         Note that nodes in the exclude_set are returned but their subtree is not visited.
 
         empty_trees = MerkleTree.empty_tree_roots(tree.height, empty_leaf, hash_func)
-        async for index, node in tree.dfs(set(empty_trees)):
+        async for index, node in tree.dfs(frozenset(empty_trees)):
             ...
 
         The returned nodes are indexed using "binary tree in array" indexing to help
         keep track of the location in the tree.
         """
-        async def dfs_inner(tree, index):
+        # An explicit stack of the nodes to visit, instead of a nested generator per layer.
+        stack: List[Tuple[int, 'MerkleTree']] = [(1, self)]
+        while len(stack) > 0:
+            index, tree = stack.pop()
             yield (index, tree)
             if tree.height == 0 or tree.root in exclude_set:
-                return
-
-            for offset, child in enumerate(await tree.get_children()):
-                async for res in dfs_inner(child, (2 * index) + offset):
-                    yield res
+                continue
 
-        async for res in dfs_inner(self, 1):
-            yield res
+            left, right = await tree.get_children()
+            # The left child is pushed last, so that it is visited first.
+            stack.append((2 * index + 1, right))
+            stack.append((2 * index, left))
 
     async def get_children(self) -> Tuple['MerkleTree', 'MerkleTree']:
         """
@@ -126,62 +133,77 @@ class MerkleTree:
         """
         if len(indices) == 0:
             return {}
-        if self.height == 0:
-            leaf = await fact_cls.get(self.storage, self.root)
-            assert leaf is not None, 'Missing leaf in db'
-            return {0: leaf}
-        left, right = await self.get_children()
-        mid = 2 ** (self.height - 1)
-        left_indices = [index for index in indices if index < mid]
-        right_indices = [(index - mid) for index in indices if index >= mid]
-
-        left_leaves, right_leaves = await asyncio.gather(
-            left.get_leaves(left_indices, fact_cls),
-            right.get_leaves(right_indices, fact_cls))
-        return {**left_leaves, **{x + mid: y for x, y in right_leaves.items()}}
+        first_leaf = 2 ** self.height
+        nodes = await self._get_path_nodes([first_leaf + index for index in indices])
+        leaves = await fact_cls.mget(self.storage, [nodes[first_leaf + index] for index in indices])
+        assert None not in leaves, 'Missing leaf in db'
+        return dict(zip(indices, leaves))
+
+    async def _get_path_nodes(self, leaf_indices: List[int]) -> Dict[int, bytes]:
+        """
+        Reads the nodes on the paths from the root to the given leaves, one layer at a time (using a
+        single storage.mget() per layer), and returns the roots of these nodes and of their
+        siblings.
+        Nodes are indexed using "binary tree in array" indexing (see dfs()).
+        """
+        assert all(2 ** self.height <= index < 2 ** (self.height + 1) for index in leaf_indices)
+        nodes = {1: self.root}
+        for depth in range(self.height):
+            layer = list({index >> (self.height - depth) for index in leaf_indices})
+            node_facts = await MerkleNodeFact.mget(self.storage, [nodes[index] for index in layer])
+            for index, node_fact in zip(layer, node_facts):
+                assert node_fact is not None, 'Missing node in db'
+                nodes[2 * index] = node_fact.left_node
+                nodes[2 * index + 1] = node_fact.right_node
+        return nodes
 
     async def get_authentication_path(self, index) -> List[bytes]:
         """
-        Returns the siblings of the nodes on the path from the root to the 'index'th leaf.
+        Returns the siblings of the nodes on the path from the root to the 'index'th leaf, starting
+        from the sibling of the leaf.
         """
-        if self.height == 0:
-            return []
-        left, right = await self.get_children()
-        mid = 2 ** (self.height - 1)
-
-        if index >= mid:
-            return await right.get_authentication_path(index - mid) + [left.root]
-        return await left.get_authentication_path(index) + [right.root]
+        leaf_index = 2 ** self.height + index
+        nodes = await self._get_path_nodes([leaf_index])
+        return [nodes[(leaf_index >> depth) ^ 1] for depth in range(self.height)]
 
     async def update(self, modifications: List[Tuple[int, Fact]]) -> 'MerkleTree':
         """
         Updates the tree with the given list of modifications, writes all the new facts to the
         storage and returns a new MerkleTree representing the fact of the root of the new tree.
+
+        The new nodes are computed bottom-up, a layer at a time, so that all the hashes of a layer
+        are requested concurrently. The new facts are written at the end, using a single
+        storage.mset().
         """
         if len(modifications) == 0:
             return self
-        if self.height == 0:
-            index, fact = modifications[-1]
-            assert index == 0
-            return MerkleTree(
-                await fact.set_fact(self.storage, self.hash_func),
-                0,
-                self.storage,
-                self.hash_func)
-        left, right = await self.get_children()
-        mid = 2 ** (self.height - 1)
-        left_modifications = [(i, val) for i, val in modifications if i < mid]
-        right_modifications = [(i - mid, val) for i, val in modifications if i >= mid]
-        if len(left_modifications) == 0:
-            right = await right.update(right_modifications)
-        elif len(right_modifications) == 0:
-            left = await left.update(left_modifications)
-        else:
-            left, right = await asyncio.gather(
-                left.update(left_modifications),
-                right.update(right_modifications))
-        new_root = await MerkleTree.combine(left, right)
-        return new_root
+        first_leaf = 2 ** self.height
+        # If an index is modified more than once, the last modification is the one that counts.
+        leaf_facts = {first_leaf + index: fact for index, fact in modifications}
+        nodes = await self._get_path_nodes(list(leaf_facts))
+
+        # Maps the DB keys of the new facts to their serialization.
+        new_facts: Dict[bytes, bytes] = {}
+
+        async def hash_fact(fact: Fact) -> bytes:
+            fact_hash = await fact._hash(self.hash_func)
+            new_facts[fact.db_key(fact_hash)] = fact.serialize()
+            return fact_hash
+
+        new_roots = await asyncio.gather(*(hash_fact(fact) for fact in leaf_facts.values()))
+        layer = dict(zip(leaf_facts, new_roots))
+        for _ in range(self.height):
+            parents = {index >> 1 for index in layer}
+            new_roots = await asyncio.gather(*(
+                hash_fact(MerkleNodeFact(
+                    layer.get(2 * index, nodes[2 * index]),
+                    layer.get(2 * index + 1, nodes[2 * index + 1]),
+                ))
+                for index in parents))
+            layer = dict(zip(parents, new_roots))
+
+        await self.storage.mset(new_facts)
+        return MerkleTree(layer[1], self.height, self.storage, self.hash_func)
 
 
 async def calc_root(index: int, value: bytes, path: List[bytes],
@@ -190,15 +212,13 @@ async def calc_root(index: int, value: bytes, path: List[bytes],
     Calculates the root of a merkle tree from a given value residing in leaf
     with a given index and an authentication path using hash_func.
     """
-    if len(path) == 0:
-        return value
-    mid = 2 ** (len(path) - 1)
-
-    if index >= mid:
-        return await hash_func(
-            path[-1], await calc_root(index - mid, value, path[:-1], hash_func))
-    return await hash_func(
-        await calc_root(index, value, path[:-1], hash_func), path[-1])
+    for sibling in path:
+        if index & 1:
+            value = await hash_func(sibling, value)
+        else:
+            value = await hash_func(value, sibling)
+        index >>= 1
+    return value
 
 
 async def verify_path(root: bytes, index: int, value: bytes, path: List[bytes],
@@ -232,6 +232,87 @@ async def test_batches_and_revert():
         assert leaves_dict == expected_leaves_dict
 
 
+async def calc_expected_root(height, leaves):
+    """
+    Computes the root of a tree with the given leaves (a dict from index to DummyLeaf), hashing
+    every node of the tree.
+    """
+    layer = [await leaves[i]._hash(hash_func) for i in range(2 ** height)]
+    for _ in range(height):
+        layer = [await hash_func(layer[i], layer[i + 1]) for i in range(0, len(layer), 2)]
+    return layer[0]
+
+
+class MsetCountingStorage(MockStorage):
+    """
+    A MockStorage that counts the calls to mset().
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.n_mset_calls = 0
+
+    async def mset(self, updates):
+        self.n_mset_calls += 1
+        await super().mset(updates)
+
+
+@pytest.mark.asyncio
+async def test_update_against_full_computation():
+    """
+    Applies two batches of random modifications (with repeated indices) and compares the resulting
+    roots and leaves with a computation of the whole tree. Also checks that each update writes its
+    new facts with a single mset().
+    """
+    height = 5
+    n_leaves = 2 ** height
+    storage = MsetCountingStorage()
+    tree = await MerkleTree.empty_tree(height, storage, DummyLeaf(0), hash_func)
+    expected_leaves = {i: DummyLeaf(0) for i in range(n_leaves)}
+
+    for _ in range(2):
+        modifications = [[random.randint(0, n_leaves - 1), DummyLeaf(random.randint(0, 9))]
+                         for _ in range(20)]
+        storage.n_mset_calls = 0
+        tree = await tree.update(modifications)
+        assert storage.n_mset_calls == 1
+        expected_leaves.update(modifications)
+        assert tree.root == await calc_expected_root(height, expected_leaves)
+        assert await tree.get_leaves(range(n_leaves), DummyLeaf) == expected_leaves
+
+
+@pytest.mark.asyncio
+async def test_update_duplicate_indices():
+    """
+    Tests that when an index is modified more than once in a single update, the last modification
+    is the one that is applied.
+    """
+    height = 3
+    storage = MockStorage()
+    empty_tree = await MerkleTree.empty_tree(height, storage, DummyLeaf(0), hash_func)
+
+    tree = await empty_tree.update([[3, DummyLeaf(1)], [5, DummyLeaf(4)], [3, DummyLeaf(2)]])
+    expected_tree = await empty_tree.update([[5, DummyLeaf(4)], [3, DummyLeaf(2)]])
+    assert tree.root == expected_tree.root
+    assert await tree.get_leaves([3, 5], DummyLeaf) == {3: DummyLeaf(2), 5: DummyLeaf(4)}
+
+
+@pytest.mark.asyncio
+async def test_update_no_modifications():
+    """
+    Tests that an update without modifications keeps the root and writes nothing.
+    """
+    height = 3
+    storage = MockStorage()
+    tree = await MerkleTree.empty_tree(height, storage, DummyLeaf(0), hash_func)
+    tree = await tree.update([[2, DummyLeaf(7)]])
+    db_before = dict(storage.db)
+
+    assert (await tree.update([])).root == tree.root
+    assert storage.db == db_before
+    assert await tree.get_leaves([], DummyLeaf) == {}
+
+
 def get_delayed_hash(delay):
     """
     Returns a delayed version for testing hash_func.
@@ -1,3 +1,5 @@
+import asyncio
+import itertools
 import json
 import logging
 from typing import Dict, Optional, Sequence, Tuple
@@ -31,42 +33,74 @@ class RedisStorage(Storage):
         return await self.redis.delete(key)
 
     async def mset(self, updates: Dict[bytes, bytes]):
-        # Convert dict to list.
-        updates_list = sum(updates.items(), ())
-        await self.redis.mset(*updates_list)
+        if len(updates) == 0:
+            return
+        # Flatten the dict to key0, value0, key1, value1, ...
+        await self.redis.mset(*itertools.chain.from_iterable(updates.items()))
 
     async def mget(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        if len(keys) == 0:
+            return ()
         return await self.redis.mget(*keys)
 
+    async def mdel(self, keys: Sequence[bytes]):
+        if len(keys) == 0:
+            return
+        await self.redis.delete(*keys)
+
     async def get_storage_data(self, mode: Optional[str] = 'full') -> str:
         data = {}
         keys_list = await self.redis.keys('*')
         keys_list.sort()
+        items = []
         for item in keys_list:
             # Attempt to decode redis key name (it fails for merkle_nodes).
-            item_name = None
-            item_type = None
-            item_value = None
             try:
                 item_name = item.decode('utf-8')
-                if mode == 'short':
-                    # Mode 'short' - exclude blockchain packages.
-                    if item_name.startswith(SHORT_MODE_EXCLUDE):
-                        continue
-                item_type = (await self.redis.type(item)).decode('utf-8')
-                if item_type == 'string':
-                    if await self.redis.get(item) is not None:
-                        item_value = await self.redis.get(item, encoding='utf-8')
-                if item_type == 'hash':
-                    if await self.redis.hgetall(item) is not None:
-                        item_value = await self.redis.hgetall(item, encoding='utf-8')
-                if item_type == 'set':
-                    if await self.redis.smembers(item) is not None:
-                        item_value = await self.redis.smembers(item, encoding='utf-8')
-                if item_type == 'list':
-                    item_value = await self.redis.lrange(item, 0, -1, encoding='utf-8')
-                data[item_name] = item_value
+            except UnicodeDecodeError:
+                continue
+            if mode == 'short':
+                # Mode 'short' - exclude blockchain packages.
+                if item_name.startswith(SHORT_MODE_EXCLUDE):
+                    continue
+            items.append((item, item_name))
+        if len(items) == 0:
+            return json.dumps(data, indent=4, sort_keys=True)
+
+        # Read all the types, and then all the values, using a pipeline for each.
+        pipeline = self.redis.pipeline()
+        for item, _ in items:
+            pipeline.type(item)
+        item_types = await pipeline.execute(return_exceptions=True)
+        items = [
+            (item, item_name, item_type) for (item, item_name), item_type in zip(items, item_types)
+            if not isinstance(item_type, Exception)]
+
+        pipeline = self.redis.pipeline()
+        value_futures = [
+            self._read_value(pipeline, item, item_type) for item, _, item_type in items]
+        await pipeline.execute(return_exceptions=True)
+
+        for (_, item_name, _), value_future in zip(items, value_futures):
+            try:
+                data[item_name] = None if value_future is None else value_future.result()
             except Exception:
                 # Some items fail because of decoding issues. This is fine. Just skip them.
                 pass
         return json.dumps(data, indent=4, sort_keys=True)
+
+    @staticmethod
+    def _read_value(pipeline, item: bytes, item_type) -> Optional[asyncio.Future]:
+        """
+        Adds a command that reads the value of item to the pipeline, according to its type, and
+        returns the future of its result. Returns None for types that are not read.
+        """
+        if item_type == b'string':
+            return pipeline.get(item, encoding='utf-8')
+        if item_type == b'hash':
+            return pipeline.hgetall(item, encoding='utf-8')
+        if item_type == b'set':
+            return pipeline.smembers(item, encoding='utf-8')
+        if item_type == b'list':
+            return pipeline.lrange(item, 0, -1, encoding='utf-8')
+        return None
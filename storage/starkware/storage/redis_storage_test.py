@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip('aioredis')
+
+from .redis_storage import RedisStorage  # noqa: E402
+
+
+class RedisMock:
+    """
+    A mock of the part of aioredis.Redis used by the tests, backed by a dict.
+    """
+
+    def __init__(self):
+        self.db = {}
+        self.n_delete_calls = 0
+
+    async def set(self, key, value):
+        self.db[key] = value
+
+    async def get(self, key):
+        return self.db.get(key)
+
+    async def delete(self, key, *keys):
+        self.n_delete_calls += 1
+        n_deleted = 0
+        for k in (key,) + keys:
+            n_deleted += self.db.pop(k, None) is not None
+        return n_deleted
+
+
+@pytest.mark.asyncio
+async def test_mdel():
+    redis = RedisMock()
+    storage = RedisStorage(redis)
+    for i in range(4):
+        await storage.set_value(b'key%d' % i, b'value')
+
+    await storage.mdel([b'key0', b'key2', b'missing'])
+    assert redis.n_delete_calls == 1
+    assert redis.db == {b'key1': b'value', b'key3': b'value'}
+
+    await storage.mdel([])
+    assert redis.n_delete_calls == 1
@@ -1,10 +1,13 @@
 import codecs
-from typing import Optional
+from typing import Optional, Sequence
 
 from botocore.exceptions import ClientError
 
 from .storage import Storage
 
+# The maximal number of keys in a single DeleteObjects request.
+MAX_KEYS_PER_DELETE = 1000
+
 
 class S3Storage(Storage):
     """
@@ -45,6 +48,19 @@ class S3Storage(Storage):
         await self.client.delete_object(Bucket=self.bucket,
                                         Key=self.prefix + '/' + S3Storage.escape(key))
 
+    async def mdel(self, keys: Sequence[bytes]):
+        for i in range(0, len(keys), MAX_KEYS_PER_DELETE):
+            response = await self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [
+                    {'Key': self.prefix + '/' + S3Storage.escape(key)}
+                    for key in keys[i:i + MAX_KEYS_PER_DELETE]]})
+            # Unlike delete_object(), delete_objects() reports the keys it failed to delete in the
+            # response, instead of raising.
+            errors = response.get('Errors')
+            if errors:
+                raise ClientError({'Error': errors[0]}, 'DeleteObjects')
+
     def get_path_from_key(self, key: bytes) -> str:
         assert isinstance(key, bytes)
         return f'{self.prefix}/{S3Storage.escape(key)}'
@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip('botocore')
+
+from botocore.exceptions import ClientError  # noqa: E402
+
+from .s3_storage import MAX_KEYS_PER_DELETE, S3Storage  # noqa: E402
+
+
+class S3ClientMock:
+    """
+    An S3 client mock that records the DeleteObjects requests, and fails to delete the given keys.
+    """
+
+    def __init__(self, failing_keys=()):
+        self.failing_keys = failing_keys
+        self.deleted_keys = []
+        self.n_requests = 0
+
+    async def delete_objects(self, Bucket, Delete):
+        self.n_requests += 1
+        keys = [obj['Key'] for obj in Delete['Objects']]
+        assert len(keys) <= MAX_KEYS_PER_DELETE
+        self.deleted_keys += [key for key in keys if key not in self.failing_keys]
+        errors = [
+            {'Key': key, 'Code': 'AccessDenied', 'Message': 'Access Denied'}
+            for key in keys if key in self.failing_keys]
+        return {'Deleted': [{'Key': key} for key in keys if key not in self.failing_keys],
+                **({'Errors': errors} if len(errors) > 0 else {})}
+
+
+@pytest.mark.asyncio
+async def test_mdel():
+    client = S3ClientMock()
+    storage = S3Storage(client, bucket='bucket', prefix='prefix')
+    keys = [b'key%d' % i for i in range(MAX_KEYS_PER_DELETE + 1)]
+    await storage.mdel(keys)
+    assert client.n_requests == 2
+    assert client.deleted_keys == [storage.get_path_from_key(key) for key in keys]
+
+    await storage.mdel([])
+    assert client.n_requests == 2
+
+
+@pytest.mark.asyncio
+async def test_mdel_errors():
+    """
+    Tests that mdel() raises when some of the keys are not deleted.
+    """
+    client = S3ClientMock(failing_keys={'prefix/key1'})
+    storage = S3Storage(client, bucket='bucket', prefix='prefix')
+    with pytest.raises(ClientError, match='Access Denied'):
+        await storage.mdel([b'key0', b'key1', b'key2'])
@@ -2,7 +2,7 @@
 import asyncio
 from abc import ABC, abstractmethod
 from importlib import import_module
-from typing import Awaitable, Callable, Dict, Optional, Sequence, Tuple, Type, TypeVar
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
 
 HASH_BYTES = 32
 
@@ -40,6 +40,9 @@ class Storage(ABC):
     async def mget(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
         return await asyncio.gather(*(self.get_value(key) for key in keys))
 
+    async def mdel(self, keys: Sequence[bytes]):
+        await asyncio.gather(*(self.del_value(key) for key in keys))
+
     async def set_int(self, key: bytes, value: int):
         value_bytes = str(value).encode('ascii')
         await self.set_value(key, value_bytes)
@@ -71,6 +74,9 @@ TDBObject = TypeVar('TDBObject', bound='DBObject')
 
 
 class DBObject(ABC):
+    # Allows subclasses to define __slots__.
+    __slots__ = ()
+
     @abstractmethod
     def serialize(self) -> bytes:
         pass
@@ -97,6 +103,15 @@ class DBObject(ABC):
             return None
         return cls.deserialize(res)
 
+    @classmethod
+    async def mget(cls: Type[TDBObject], storage: Storage, suffixes: Sequence[bytes]) -> \
+            List[Optional[TDBObject]]:
+        """
+        Same as get(), for multiple objects. The objects are read using a single storage.mget().
+        """
+        values = await storage.mget([cls.db_key(suffix) for suffix in suffixes])
+        return [None if value is None else cls.deserialize(value) for value in values]
+
     async def set(self, storage: Storage, suffix: bytes):
         await storage.set_value(self.db_key(suffix), self.serialize())
 
@@ -109,6 +124,8 @@ class Fact(DBObject):
     A fact is a DB object with a DB key that is a hash of its value.
     Use set_fact() and get() to read and write facts.
     """
+    __slots__ = ()
+
     @abstractmethod
     async def _hash(self, hash_func: Callable[[bytes, bytes], Awaitable[bytes]]) -> bytes:
         pass
@@ -2,10 +2,10 @@ import asyncio
 
 import pytest
 
-from starkware.storage.dict_storage import DictStorage
+from starkware.storage.dict_storage import CachedStorage, DictStorage
 from starkware.storage.storage import Storage
 
-from .test_utils import DummyLockManager
+from .test_utils import DummyLockManager, MockStorage
 
 
 @pytest.mark.asyncio
@@ -30,6 +30,21 @@ async def test_dummy_lock():
         await t
 
 
+@pytest.mark.asyncio
+async def test_dummy_lock_fifo():
+    lock_manager = DummyLockManager()
+    order = []
+
+    async def lock_and_record(i):
+        async with await lock_manager.lock('lock'):
+            order.append(i)
+            await asyncio.sleep(0.001)
+
+    await asyncio.gather(*(lock_and_record(i) for i in range(10)))
+    assert order == list(range(10))
+    assert lock_manager.locked == {}
+
+
 @pytest.mark.asyncio
 async def test_from_config():
     config = {'class': 'starkware.storage.dict_storage.DictStorage',
@@ -41,3 +56,42 @@ async def test_from_config():
     config['config']['bad_param'] = None
     with pytest.raises(TypeError, match='got an unexpected keyword argument'):
         await Storage.from_config(config)
+
+
+@pytest.mark.asyncio
+async def test_cached_storage():
+    class CountingStorage(DictStorage):
+        n_gets = 0
+
+        async def get_value(self, key: bytes):
+            self.n_gets += 1
+            await asyncio.sleep(0.01)
+            return await super().get_value(key)
+
+    inner_storage = CountingStorage({b'key': b'value'})
+    storage = CachedStorage(inner_storage, max_size=10)
+
+    # Concurrent reads of the same key are served by a single read.
+    assert await asyncio.gather(*(storage.get_value(b'key') for _ in range(3))) == [b'value'] * 3
+    assert inner_storage.n_gets == 1
+    assert await storage.get_value(b'key') == b'value'
+    assert inner_storage.n_gets == 1
+
+    # Missing keys are not cached.
+    assert await storage.get_value(b'missing') is None
+    assert await storage.get_value(b'missing') is None
+    assert inner_storage.n_gets == 3
+    assert storage.pending_reads == {}
+
+
+@pytest.mark.asyncio
+async def test_mdel():
+    """
+    Tests the default implementation of Storage.mdel().
+    """
+    storage = MockStorage()
+    await storage.mset({b'key%d' % i: b'value' for i in range(4)})
+    await storage.mdel([b'key0', b'key2', b'missing'])
+    assert storage.db == {b'key1': b'value', b'key3': b'value'}
+    await storage.mdel([])
+    assert len(storage.db) == 2
@@ -1,7 +1,8 @@
 import asyncio
 import hashlib
+from collections import deque
 from contextlib import contextmanager
-from typing import Optional
+from typing import Deque, Dict, Optional
 
 from .storage import HASH_BYTES, LockManager, LockObject, Storage
 
@@ -29,17 +30,38 @@ class DummyLockObject(LockObject):
 
 class DummyLockManager(LockManager):
     def __init__(self):
-        self.locked = {}
+        # Maps the name of each held lock to the futures of its waiters, in FIFO order. The deque
+        # is only created once there is a waiter (None means the lock is held and uncontended).
+        self.locked: Dict[str, Optional[Deque[asyncio.Future]]] = {}
 
     async def lock(self, name: str) -> DummyLockObject:
-        while name in self.locked:
-            await self.locked[name]
-        future: asyncio.Future = asyncio.Future()
-        self.locked[name] = future
+        if name not in self.locked:
+            self.locked[name] = None
+            return DummyLockObject(self, name)
+
+        waiters = self.locked[name]
+        if waiters is None:
+            waiters = self.locked[name] = deque()
+
+        # Wait until the lock is handed over by unlock().
+        future = asyncio.get_event_loop().create_future()
+        waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The lock was handed over just before the cancellation.
+                await self.unlock(name)
+            raise
         return DummyLockObject(self, name)
 
     async def unlock(self, name):
-        self.locked[name].set_result(True)
+        waiters = self.locked[name]
+        while waiters:
+            future = waiters.popleft()
+            if not future.done():
+                future.set_result(True)
+                return
         del self.locked[name]
 
 
@@ -79,10 +101,11 @@ class MockStorage(Storage):
     async def setnx_value(self, key: bytes, value: bytes) -> bool:
         assert isinstance(key, bytes)
         assert isinstance(value, bytes)
-        if self.db.get(key, None) is None:
-            self.db[key] = value
-            return True
-        return False
+        # Checking the identity of the value returned by setdefault() is not enough, as small bytes
+        # objects (e.g., b'1') are shared. The size of the dict tells whether the key was added.
+        n_keys = len(self.db)
+        self.db.setdefault(key, value)
+        return len(self.db) > n_keys
 
     async def get_value(self, key: bytes) -> Optional[bytes]:
         assert isinstance(key, bytes)
@@ -90,10 +113,7 @@ class MockStorage(Storage):
 
     async def del_value(self, key: bytes):
         assert isinstance(key, bytes)
-        try:
-            del self.db[key]
-        except KeyError:
-            pass
+        self.db.pop(key, None)
 
     async def set_int(self, key: bytes, value: int):
         assert isinstance(key, bytes)
@@ -125,21 +145,28 @@ class DelayedStorage(Storage):
         self.write_delay = write_delay
         self.storage = MockStorage()
 
+    # The simple operations access self.storage.db directly after the delay, rather than awaiting
+    # the corresponding MockStorage coroutine.
+
     async def set_value(self, key: bytes, value: bytes):
+        assert isinstance(key, bytes)
+        assert isinstance(value, bytes)
         await asyncio.sleep(self.write_delay)
-        await self.storage.set_value(key, value)
+        self.storage.db[key] = value
 
     async def setnx_value(self, key: bytes, value: bytes) -> bool:
         await asyncio.sleep(self.write_delay)
         return await self.storage.setnx_value(key, value)
 
     async def get_value(self, key: bytes) -> Optional[bytes]:
+        assert isinstance(key, bytes)
         await asyncio.sleep(self.read_delay)
-        return await self.storage.get_value(key)
+        return self.storage.db.get(key, None)
 
     async def del_value(self, key: bytes):
+        assert isinstance(key, bytes)
         await asyncio.sleep(self.write_delay)
-        await self.storage.del_value(key)
+        self.storage.db.pop(key, None)
 
 
 def check_time(t0, min_t, max_t):
@@ -147,7 +174,7 @@ def check_time(t0, min_t, max_t):
     Assuming t0 is the start time, checks the current time, and that it does not exceeds the
     given boundaries.
     """
-    t1 = asyncio.get_event_loop().time()
+    t1 = asyncio.get_running_loop().time()
     delta = t1 - t0
     assert min_t <= delta <= max_t, \
         'Timing test failed'
@@ -163,12 +190,11 @@ def timed_call_range(min_t=0, max_t=2**20):
     with timed_call(2.9, 3.1):
         time.sleep(3)
     """
-    t0 = asyncio.get_event_loop().time()
+    t0 = asyncio.get_running_loop().time()
     yield
     check_time(t0, min_t, max_t)
 
 
-@contextmanager
 def timed_call(expected, epsilon=0.1):
     """
     Context manager that asserts the code within took some amount of time, between
@@ -178,6 +204,4 @@ def timed_call(expected, epsilon=0.1):
     with timed_call(3):
         time.sleep(3)
     """
-    t0 = asyncio.get_event_loop().time()
-    yield
-    check_time(t0, expected - epsilon, expected + epsilon)
+    return timed_call_range(expected - epsilon, expected + epsilon)